@@ -0,0 +1,210 @@
+"""
+Arena para enfrentar motores de juego entre sí muchas veces
+
+Un motor es un diccionario con su nombre y los parámetros de
+JugadorNegamax, por ejemplo:
+
+    {'nombre': 'avanzado-d6', 'ordena': ordenar_jugadas_avanzado,
+     'evalua': evalua_nuevo, 'd': 6}
+
+o con 'tiempo' en lugar de 'd' para jugar limitado en tiempo. Las
+funciones deben estar definidas a nivel de módulo para poder mandarlas
+a otros procesos.
+
+Las partidas se juegan en parejas con la misma apertura aleatoria, una
+con cada motor empezando. Cada resultado se agrega en cuanto termina a
+un archivo JSONL, y si el archivo ya existe solo se juegan las partidas
+que falten, así que un torneo largo se puede interrumpir y continuar.
+
+"""
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from math import log10, sqrt
+from random import Random
+from time import perf_counter
+
+from juegos_simplificado import juega_dos_jugadores
+from minimax import JugadorNegamax
+
+
+class _Cronometrado:
+    """
+    Jugador que juega al azar las primeras jugadas de la partida
+    y después mide cuánto tarda el motor en cada jugada
+
+    """
+    def __init__(self, motor, partida):
+        parametros = {k: v for k, v in motor.items() if k != 'nombre'}
+        self.jugador = JugadorNegamax(**parametros)
+        self.partida = partida
+        self.latencias = []
+
+    def __call__(self, juego, s, j):
+        if self.partida['azar'] > 0:
+            self.partida['azar'] -= 1
+            return self.partida['rnd'].choice(list(juego.jugadas_legales(s, j)))
+        t0 = perf_counter()
+        a = self.jugador(juego, s, j)
+        self.latencias.append(perf_counter() - t0)
+        return a
+
+
+def _juega_partida(juego, x, o, n, aperturas, semilla, juega):
+    """
+    Juega la partida n entre los motores x (empieza) y o
+
+    """
+    # Las dos partidas de cada pareja usan la misma apertura
+    partida = {'azar': aperturas, 'rnd': Random(semilla * 1000003 + n // 2)}
+    jx, jo = _Cronometrado(x, partida), _Cronometrado(o, partida)
+    g, _ = juega(juego, jx, jo)
+    return {
+        'partida': n, 'x': x['nombre'], 'o': o['nombre'], 'ganancia': g,
+        'latencias': {x['nombre']: jx.latencias, o['nombre']: jo.latencias},
+    }
+
+
+def _lee_resultados(archivo):
+    if not os.path.exists(archivo):
+        return []
+    with open(archivo) as f:
+        return [json.loads(linea) for linea in f if linea.strip()]
+
+
+def torneo(
+    juego, motor1, motor2, partidas=100, aperturas=4, archivo='torneo.jsonl',
+    trabajadores=None, semilla=0, juega=juega_dos_jugadores
+    ):
+    """
+    Juega partidas entre motor1 y motor2 en paralelo, alternando quién
+    empieza, y devuelve el resumen del torneo (ver resume)
+
+    juego (ModeloJuegoZT2): Modelo del juego
+    motor1, motor2 (dict): Configuración de cada motor
+    partidas (int): Número total de partidas
+    aperturas (int): Número de jugadas al azar al inicio de cada partida
+    archivo (str): Archivo JSONL donde se guardan los resultados
+    trabajadores (int): Número de procesos, si None uno por núcleo
+    semilla (int): Semilla para las aperturas
+    juega (function): Función que juega una partida, como juega_dos_jugadores
+
+    """
+    if motor1['nombre'] == motor2['nombre']:
+        raise ValueError("Los motores deben tener nombres distintos")
+    hechas = {r['partida'] for r in _lee_resultados(archivo)}
+    pendientes = [n for n in range(partidas) if n not in hechas]
+    with ProcessPoolExecutor(trabajadores) as pool, open(archivo, 'a') as f:
+        futuros = [
+            pool.submit(
+                _juega_partida, juego,
+                motor1 if n % 2 == 0 else motor2,
+                motor2 if n % 2 == 0 else motor1,
+                n, aperturas, semilla, juega
+            )
+            for n in pendientes
+        ]
+        # En el orden en que terminan, para no perder las ya jugadas si se
+        # interrumpe mientras sigue una partida larga
+        for futuro in as_completed(futuros):
+            f.write(json.dumps(futuro.result()) + '\n')
+            f.flush()
+    resultados = [r for r in _lee_resultados(archivo) if r['partida'] < partidas]
+    return resume(resultados, motor1['nombre'])
+
+
+def _elo(p):
+    p = min(max(p, 1e-6), 1 - 1e-6)
+    return -400 * log10(1 / p - 1)
+
+
+def _percentil(datos, q):
+    datos = sorted(datos)
+    if not datos:
+        return None
+    return datos[min(len(datos) - 1, int(q / 100 * len(datos)))]
+
+
+def resume(resultados, nombre):
+    """
+    Resume los resultados desde el punto de vista del motor nombre:
+    ganadas, empates, perdidas, diferencia de Elo con intervalo de
+    confianza del 95% y percentiles de la latencia por jugada de cada motor
+
+    """
+    puntos = []
+    for r in resultados:
+        signo = 1 if r['x'] == nombre else -1
+        puntos.append((1 + signo * r['ganancia']) / 2)
+    n = len(puntos)
+    resumen = {
+        'partidas': n,
+        'ganadas': puntos.count(1),
+        'empates': puntos.count(0.5),
+        'perdidas': puntos.count(0),
+    }
+    if n:
+        p = sum(puntos) / n
+        error = 1.96 * sqrt(max(sum(x * x for x in puntos) / n - p * p, 0) / n)
+        resumen['elo'] = _elo(p)
+        resumen['elo_intervalo'] = (_elo(p - error), _elo(p + error))
+
+    latencias = {}
+    for r in resultados:
+        for motor, tiempos in r['latencias'].items():
+            latencias.setdefault(motor, []).extend(tiempos)
+    resumen['latencias'] = {
+        motor: {f'p{q}': _percentil(tiempos, q) for q in (50, 90, 99, 100)}
+        for motor, tiempos in latencias.items()
+    }
+    return resumen
+
+
+def reporta(resumen, nombre='motor 1'):
+    """
+    Imprime el resumen de un torneo
+
+    """
+    print(f"Partidas: {resumen['partidas']}")
+    print(
+        f"{nombre}: {resumen['ganadas']} ganadas, {resumen['empates']} "
+        f"empates, {resumen['perdidas']} perdidas"
+    )
+    if 'elo' in resumen:
+        bajo, alto = resumen['elo_intervalo']
+        print(f"Elo: {resumen['elo']:+.0f} (95%: {bajo:+.0f} a {alto:+.0f})")
+    for motor, percentiles in resumen['latencias'].items():
+        texto = ', '.join(
+            f"{q} {t * 1000:.1f} ms" for q, t in percentiles.items() if t != None
+        )
+        print(f"Latencia de {motor}: {texto}")
+
+
+if __name__ == '__main__':
+    import argparse
+    from conect4 import Conecta4, evalua_nuevo, evalua_3con
+    from conect4 import ordena_centro, ordenar_jugadas_avanzado
+
+    parser = argparse.ArgumentParser(description="Torneo de Conecta 4")
+    parser.add_argument('--partidas', type=int, default=100)
+    parser.add_argument('--profundidad', type=int, default=4)
+    parser.add_argument('--aperturas', type=int, default=4)
+    parser.add_argument('--trabajadores', type=int, default=None)
+    parser.add_argument('--archivo', default='torneo_conecta4.jsonl')
+    args = parser.parse_args()
+
+    motor1 = {
+        'nombre': f'nuevo-d{args.profundidad}', 'ordena': ordenar_jugadas_avanzado,
+        'evalua': evalua_nuevo, 'd': args.profundidad
+    }
+    motor2 = {
+        'nombre': f'3con-d{args.profundidad}', 'ordena': ordena_centro,
+        'evalua': evalua_3con, 'd': args.profundidad
+    }
+    resumen = torneo(
+        Conecta4(), motor1, motor2, partidas=args.partidas,
+        aperturas=args.aperturas, archivo=args.archivo,
+        trabajadores=args.trabajadores
+    )
+    reporta(resumen, motor1['nombre'])
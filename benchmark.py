@@ -0,0 +1,354 @@
+"""
+Benchmark reproducible de la búsqueda para el gato, conecta 4 y el
+super gato
+
+Cada juego tiene tres conjuntos fijos de posiciones (aperturas, medio
+juego y casi finales), dadas como las jugadas que llevan a ellas desde
+el estado inicial. Si se cambian las posiciones hay que subir VERSION,
+pues los resultados ya no son comparables.
+
+Cada posición se busca a profundidad fija con una configuración del
+motor, fijando antes la semilla del azar (para los ordenamientos
+aleatorios), y se reportan los nodos, nodos por segundo, tiempo y la
+jugada elegida. Los resultados se pueden guardar como línea base en
+JSON y comparar contra ella con umbrales de regresión.
+
+Uso:
+    python benchmark.py --guarda base.json
+    python benchmark.py --compara base.json
+    python benchmark.py --memoria
+
+"""
+
+import json
+import random
+import sys
+import tracemalloc
+from time import perf_counter
+
+from minimax import negamax, mtdf, Estadisticas, OrdenaHistoria
+from gato import Gato
+from conect4 import Conecta4, evalua_nuevo, ordenar_jugadas_avanzado
+from utt import UltimateTTT, ordena_centro, simple_evalua_uttt
+
+VERSION = 1
+
+POSICIONES = {
+    'gato': {
+        'aperturas': [[2, 5], [6], [8, 3], [5, 7]],
+        'medio': [[4, 6, 5], [3, 8, 6], [8, 3, 7], [0, 6, 7, 4]],
+        'final': [
+            [3, 6, 4, 5, 2, 1], [3, 4, 0, 8, 2, 1],
+            [8, 5, 7, 4, 3, 0], [7, 2, 3, 5, 8, 4]
+        ],
+    },
+    'conecta4': {
+        'aperturas': [[5, 5, 3], [5, 5], [2, 1], [5, 0, 0, 6]],
+        'medio': [
+            [0, 1, 3, 5, 1, 2, 1, 0, 1, 6, 2, 1, 5],
+            [4, 2, 3, 4, 3, 5, 3, 1, 6, 0, 2, 2, 2, 1, 4],
+            [4, 5, 4, 3, 5, 5, 5, 0, 0, 1, 0, 4],
+            [6, 1, 5, 4, 0, 4, 1, 1, 3, 4, 6, 5, 1],
+        ],
+        'final': [
+            [0, 1, 4, 0, 6, 4, 4, 6, 4, 5, 0, 4, 0, 4, 1, 5, 6, 2, 0, 0, 3,
+             1, 2, 1, 1, 6, 6],
+            [2, 4, 6, 4, 1, 1, 4, 4, 0, 3, 0, 4, 5, 5, 2, 3, 4, 1, 1, 0, 5,
+             0, 1, 3, 5, 5],
+            [3, 0, 0, 4, 2, 1, 5, 3, 6, 4, 6, 5, 0, 1, 6, 4, 1, 1, 2, 5, 1,
+             6, 5, 6, 3, 5],
+            [1, 2, 3, 2, 5, 5, 2, 4, 6, 6, 1, 0, 4, 2, 3, 1, 4, 2, 1, 4, 6,
+             2, 1, 5, 1, 5],
+        ],
+    },
+    'utt': {
+        'aperturas': [
+            [(7, 6), (6, 3), (3, 2), (2, 2)], [(3, 2), (2, 4), (4, 0), (0, 1)],
+            [(7, 4), (4, 6), (6, 0)], [(2, 1), (1, 4), (4, 5)],
+        ],
+        'medio': [
+            [(4, 8), (8, 4), (4, 7), (7, 7), (7, 0), (0, 4), (4, 1), (1, 6),
+             (6, 7), (7, 6), (6, 5), (5, 8), (8, 8), (8, 2), (2, 2), (2, 1),
+             (1, 4), (4, 2), (2, 3), (3, 7), (7, 4), (4, 4)],
+            [(0, 0), (0, 3), (3, 1), (1, 6), (6, 0), (0, 4), (4, 1), (1, 1),
+             (1, 7), (7, 7), (7, 8), (8, 3), (3, 4), (4, 6), (6, 5), (5, 7),
+             (7, 2), (2, 0), (0, 8), (8, 4), (4, 7), (7, 6), (6, 6), (6, 4)],
+            [(4, 3), (3, 5), (5, 4), (4, 6), (6, 0), (0, 2), (2, 8), (8, 8),
+             (8, 4), (4, 2), (2, 5), (5, 2), (2, 0), (0, 6), (6, 1), (1, 5),
+             (5, 8), (8, 2)],
+            [(2, 5), (5, 4), (4, 7), (7, 8), (8, 0), (0, 2), (2, 1), (1, 7),
+             (7, 4), (4, 6), (6, 0), (0, 7), (7, 1), (1, 2), (2, 2), (2, 4),
+             (4, 0), (0, 4)],
+        ],
+        'final': [
+            [(5, 8), (8, 3), (3, 1), (1, 5), (5, 7), (7, 5), (5, 0), (0, 8),
+             (8, 7), (7, 8), (8, 1), (1, 2), (2, 1), (1, 6), (6, 6), (6, 8),
+             (8, 5), (5, 4), (4, 7), (7, 6), (6, 1), (1, 0), (0, 7), (7, 7),
+             (5, 6), (6, 5), (0, 4), (4, 4), (4, 8), (8, 0), (0, 2), (2, 6),
+             (6, 0), (0, 3), (3, 8), (8, 8), (8, 6), (6, 4), (4, 6), (6, 3)],
+            [(7, 1), (1, 4), (4, 1), (1, 0), (0, 3), (3, 8), (8, 6), (6, 2),
+             (2, 2), (2, 4), (4, 0), (0, 0), (0, 4), (4, 2), (2, 0), (0, 5),
+             (5, 2), (2, 3), (3, 3), (3, 5), (5, 5), (5, 8), (8, 1), (1, 2),
+             (2, 1), (1, 5), (5, 3), (3, 0), (0, 8), (8, 3), (3, 7), (7, 3),
+             (3, 1), (1, 6), (6, 5), (5, 0), (0, 7), (7, 5), (5, 4), (4, 3),
+             (3, 6)],
+            [(5, 0), (0, 4), (4, 8), (8, 0), (0, 8), (8, 4), (4, 5), (5, 8),
+             (8, 1), (1, 2), (2, 3), (3, 5), (5, 1), (1, 1), (1, 5), (5, 2),
+             (2, 1), (1, 3), (3, 0), (0, 7), (7, 1), (1, 4), (4, 6), (6, 7),
+             (7, 4), (4, 7), (7, 2), (2, 2), (2, 6), (6, 6), (6, 4), (4, 4),
+             (4, 0), (0, 6), (6, 3), (3, 8), (8, 7)],
+            [(7, 3), (3, 4), (4, 2), (2, 3), (3, 6), (6, 3), (3, 1), (1, 7),
+             (7, 0), (0, 2), (2, 5), (5, 6), (6, 4), (4, 7), (7, 5), (5, 2),
+             (2, 4), (4, 4), (4, 5), (5, 5), (5, 8), (8, 1), (1, 4), (4, 8),
+             (8, 5), (5, 7), (7, 2), (2, 2), (2, 0), (0, 6), (6, 0), (0, 3),
+             (3, 5), (5, 0), (0, 7), (7, 4), (4, 1), (1, 5), (5, 1), (1, 3),
+             (3, 0)],
+        ],
+    },
+}
+
+JUEGOS = {'gato': Gato, 'conecta4': Conecta4, 'utt': UltimateTTT}
+
+# Configuraciones del motor: parámetros de negamax para cada juego
+CONFIGURACIONES = {
+    'base': {
+        'gato': {},
+        'conecta4': {
+            'ordena': ordenar_jugadas_avanzado, 'evalua': evalua_nuevo, 'd': 8
+        },
+        'utt': {'ordena': ordena_centro, 'evalua': simple_evalua_uttt, 'd': 4},
+    },
+    'historia': {
+        'gato': {'ordena': OrdenaHistoria()},
+        'conecta4': {
+            'ordena': OrdenaHistoria(ordenar_jugadas_avanzado),
+            'evalua': evalua_nuevo, 'd': 8
+        },
+        'utt': {
+            'ordena': OrdenaHistoria(ordena_centro),
+            'evalua': simple_evalua_uttt, 'd': 4
+        },
+    },
+}
+
+
+def posicion(nombre, jugadas):
+    """
+    Devuelve el juego, el estado y el jugador que resultan de
+    hacer las jugadas desde el inicio del juego nombre
+
+    """
+    juego = JUEGOS[nombre]()
+    s, j = juego.inicializa()
+    for a in jugadas:
+        s = juego.transicion(s, a, j)
+        j = -j
+    return juego, s, j
+
+
+def corre(config='base', juegos=None, semilla=0, busca=negamax, **extra):
+    """
+    Corre el benchmark con la configuración config (más los parámetros
+    de negamax en extra) y devuelve un diccionario de resultados
+    indexado por 'juego/conjunto/indice'
+
+    busca es la función de búsqueda, negamax o mtdf
+
+    """
+    resultados = {}
+    for nombre in juegos or POSICIONES:
+        parametros = dict(CONFIGURACIONES[config][nombre], **extra)
+        for conjunto, posiciones in POSICIONES[nombre].items():
+            for i, jugadas in enumerate(posiciones):
+                juego, s, j = posicion(nombre, jugadas)
+                stats = Estadisticas(parametros.get('d'))
+                random.seed(semilla)
+                t0 = perf_counter()
+                traza, v = busca(juego, s, j, stats=stats, **parametros)
+                t = perf_counter() - t0
+                resultados[f'{nombre}/{conjunto}/{i}'] = {
+                    'nodos': stats.nodos,
+                    'segundos': t,
+                    'nodos_seg': stats.nodos / t if t > 0 else None,
+                    'jugada': traza[0],
+                    'valor': v,
+                    'tt_aciertos': stats.tt_aciertos,
+                    'cortes_primera': stats.tasa_primera,
+                }
+    return resultados
+
+
+def _mide(f, cuenta):
+    # f que suma a cuenta los bytes que reserva y el número de llamadas
+    def medida(*args):
+        tracemalloc.reset_peak()
+        antes = tracemalloc.get_traced_memory()[0]
+        r = f(*args)
+        cuenta[0] += tracemalloc.get_traced_memory()[1] - antes
+        cuenta[1] += 1
+        return r
+    return medida
+
+
+def memoria(config='base', juegos=None, semilla=0):
+    """
+    Bytes por nodo que reservan las jugadas y la evaluación durante la
+    búsqueda completa de cada posición del benchmark, medidos con
+    tracemalloc: con transicion (mutable=False) y haciendo y deshaciendo
+    las jugadas en un tablero mutable (mutable=True)
+
+    No incluye lo que reserva el propio negamax (listas de jugadas,
+    trazas y entradas de la tabla de transposición)
+
+    """
+    resultados = {}
+    tracemalloc.start()
+    # Lo que reserva la propia medición (la tupla de get_traced_memory)
+    vacio = [0, 0]
+    nada = _mide(lambda: None, vacio)
+    for _ in range(10):
+        nada()
+    vacio = vacio[0] / vacio[1]
+    for nombre in juegos or POSICIONES:
+        por_nodo = []
+        for mutable in (False, True):
+            cuenta, nodos = [0, 0], 0
+            for posiciones in POSICIONES[nombre].values():
+                for jugadas in posiciones:
+                    juego, s, j = posicion(nombre, jugadas)
+                    for metodo in ('transicion', 'haz_jugada', 'deshaz_jugada'):
+                        setattr(juego, metodo, _mide(getattr(juego, metodo), cuenta))
+                    parametros = dict(CONFIGURACIONES[config][nombre])
+                    if 'evalua' in parametros:
+                        parametros['evalua'] = _mide(parametros['evalua'], cuenta)
+                    stats = Estadisticas(parametros.get('d'))
+                    random.seed(semilla)
+                    negamax(juego, s, j, stats=stats, mutable=mutable, **parametros)
+                    nodos += stats.nodos
+            por_nodo.append((cuenta[0] - vacio * cuenta[1]) / nodos)
+        resultados[nombre] = tuple(por_nodo)
+    tracemalloc.stop()
+    return resultados
+
+
+def compara(
+    resultados, base, umbral_nodos=0.05, umbral_tiempo=0.25, minimo_tiempo=0.01
+    ):
+    """
+    Compara contra una línea base y devuelve la lista de regresiones:
+    posiciones con más nodos, o juegos con más tiempo en total, que los
+    umbrales relativos. Los nodos no dependen de la máquina, pero el tiempo
+    de una sola posición es demasiado ruidoso, así que se suma por juego, 
+    y los totales de menos de minimo_tiempo segundos no se comparan
+
+    """
+    regresiones = []
+    tiempos = {}
+    for llave, r in resultados.items():
+        if llave not in base:
+            continue
+        b = base[llave]
+        if r['nodos'] > b['nodos'] * (1 + umbral_nodos):
+            regresiones.append(f"{llave}: nodos {b['nodos']} -> {r['nodos']}")
+        juego = llave.split('/')[0]
+        antes, ahora = tiempos.get(juego, (0.0, 0.0))
+        tiempos[juego] = antes + b['segundos'], ahora + r['segundos']
+    for juego, (antes, ahora) in tiempos.items():
+        if (max(antes, ahora) >= minimo_tiempo
+                and ahora > antes * (1 + umbral_tiempo)):
+            regresiones.append(f"{juego}: tiempo {antes:.3f}s -> {ahora:.3f}s")
+    return regresiones
+
+
+def reporta(resultados, base=None):
+    """
+    Imprime la tabla de resultados, con el cambio de nodos y la
+    jugada anterior si hay línea base
+
+    """
+    print(
+        f"{'posición':22} {'nodos':>9} {'nodos/s':>9} {'tiempo':>8} "
+        f"{'tt':>7} {'1a':>5}  jugada"
+    )
+    for llave, r in resultados.items():
+        linea = (
+            f"{llave:22} {r['nodos']:9d} {r['nodos_seg'] or 0:9.0f} "
+            f"{r['segundos']:7.3f}s {r['tt_aciertos']:7d} "
+            f"{r['cortes_primera']:5.2f}  {r['jugada']}"
+        )
+        if base and llave in base:
+            b = base[llave]
+            linea += f"  ({(r['nodos'] / b['nodos'] - 1) * 100:+.1f}% nodos"
+            # En JSON las jugadas que son tuplas se vuelven listas
+            if json.loads(json.dumps(r['jugada'])) != b['jugada']:
+                linea += f", antes {b['jugada']}"
+            linea += ")"
+        print(linea)
+    total_nodos = sum(r['nodos'] for r in resultados.values())
+    total_t = sum(r['segundos'] for r in resultados.values())
+    print(f"Total: {total_nodos} nodos en {total_t:.2f}s")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark de la búsqueda")
+    parser.add_argument('--config', default='base', choices=CONFIGURACIONES)
+    parser.add_argument('--juego', action='append', choices=POSICIONES)
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--pvs', action='store_true')
+    parser.add_argument('--mtdf', action='store_true', help="Busca con mtdf")
+    parser.add_argument(
+        '--simetria', action='store_true',
+        help="Llaves canónicas por simetría en la tabla de transposición"
+    )
+    parser.add_argument(
+        '--memoria', action='store_true',
+        help="Solo mide los bytes por nodo que reservan jugadas y evaluación"
+    )
+    parser.add_argument('--guarda', help="Guarda los resultados como línea base")
+    parser.add_argument('--compara', help="Línea base contra la cual comparar")
+    parser.add_argument('--umbral-nodos', type=float, default=0.05)
+    parser.add_argument('--umbral-tiempo', type=float, default=0.25)
+    parser.add_argument(
+        '--minimo-tiempo', type=float, default=0.01,
+        help="Segundos por juego debajo de los cuales no se compara el tiempo"
+    )
+    args = parser.parse_args()
+    if args.mtdf and args.pvs:
+        # mtdf solo hace búsquedas de ventana nula, donde PVS no cambia nada
+        parser.error("--pvs no se puede usar con --mtdf")
+
+    if args.memoria:
+        print(f"{'juego':10} {'transicion':>10} {'haz_jugada':>10}  (bytes por nodo)")
+        for nombre, (inmutable, mutable) in memoria(
+                args.config, args.juego, args.semilla).items():
+            print(f"{nombre:10} {inmutable:10.1f} {mutable:10.1f}")
+        sys.exit()
+
+    extra = {'pvs': True} if args.pvs else {}
+    if args.simetria:
+        extra['simetria'] = True
+    busca = mtdf if args.mtdf else negamax
+    resultados = corre(args.config, args.juego, args.semilla, busca, **extra)
+
+    base = None
+    if args.compara:
+        with open(args.compara) as f:
+            datos = json.load(f)
+        if datos['version'] != VERSION:
+            sys.exit(f"La línea base es de la versión {datos['version']}, no {VERSION}")
+        base = datos['resultados']
+    reporta(resultados, base)
+
+    if args.guarda:
+        with open(args.guarda, 'w') as f:
+            json.dump({'version': VERSION, 'resultados': resultados}, f, indent=1)
+    if base:
+        regresiones = compara(
+            resultados, base, args.umbral_nodos, args.umbral_tiempo,
+            args.minimo_tiempo
+        )
+        for regresion in regresiones:
+            print("REGRESIÓN", regresion)
+        sys.exit(1 if regresiones else 0)
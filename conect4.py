@@ -27,9 +27,72 @@ empate.
 """
 
 from juegos_simplificado import ModeloJuegoZT2
+from juegos_simplificado import Estado, Tablero
+from juegos_simplificado import zobrist, clave_zobrist, claves_simetricas
 from juegos_simplificado import juega_dos_jugadores
-from minimax import jugador_negamax
-from minimax import minimax_iterativo
+from lineas import LINEAS_CONECTA4, LINEAS_CONECTA4_CELDA, ESPEJO_CONECTA4
+from lineas import ganador_lineas, suma_lineas
+from minimax import JugadorNegamax
+
+def _ventanas_3con():
+    """
+    Ventanas de 3 casillas que revisa evalua_3con (con los mismos rangos
+    que la versión original, incluida la diagonal que da la vuelta)
+
+    """
+    return tuple(
+        [(i + 7 * j, i + 7 * (j + 1), i + 7 * (j + 2))
+         for i in range(7) for j in range(4)] +
+        [(7 * i + j, 7 * i + j + 1, 7 * i + j + 2)
+         for i in range(6) for j in range(5)] +
+        [(i + 7 * j, i + 7 * j + 8, i + 7 * j + 16)
+         for i in range(5) for j in range(4)] +
+        [(i + 7 * j + 3, i + 7 * j + 9, i + 7 * j + 15)
+         for i in range(5) for j in range(4)]
+    )
+
+def _ventanas_nuevo():
+    """
+    Ventanas de 3 y de 2 casillas que revisa evalua_nuevo (con los mismos
+    rangos que la versión original)
+
+    """
+    tres = (
+        [(7 * i + j, 7 * i + j + 7, 7 * i + j + 14)
+         for i in range(4) for j in range(7)] +
+        [(7 * i + j, 7 * i + j + 1, 7 * i + j + 2)
+         for i in range(6) for j in range(4)] +
+        [(7 * i + j, 7 * i + j - 6, 7 * i + j - 12)
+         for i in range(3, 6) for j in range(4)] +
+        [(7 * i + j, 7 * i + j + 8, 7 * i + j + 16)
+         for i in range(4) for j in range(5)]
+    )
+    dos = (
+        [(7 * i + j, 7 * i + j + 7) for i in range(5) for j in range(7)] +
+        [(7 * i + j, 7 * i + j + 1) for i in range(6) for j in range(5)] +
+        [(7 * i + j, 7 * i + j - 6) for i in range(4, 6) for j in range(5)] +
+        [(7 * i + j, 7 * i + j + 8) for i in range(4) for j in range(5)]
+    )
+    return tuple(tres), tuple(dos)
+
+VENTANAS_3CON = _ventanas_3con()
+VENTANAS_NUEVO_3, VENTANAS_NUEVO_2 = _ventanas_nuevo()
+# Las ventanas de 3 valen 5 y las de 2 valen 1
+VENTANAS_NUEVO = (
+    tuple((v, 5) for v in VENTANAS_NUEVO_3) +
+    tuple((v, 1) for v in VENTANAS_NUEVO_2)
+)
+# Para cada casilla, las ventanas de evalua_nuevo que la contienen,
+# dadas por las otras casillas de la ventana y su peso
+DELTAS_NUEVO = tuple(
+    tuple(
+        (tuple(i for i in v if i != celda), peso)
+        for v, peso in VENTANAS_NUEVO if celda in v
+    )
+    for celda in range(42)
+)
+ZOBRIST = zobrist(42)
+
 
 class Conecta4(ModeloJuegoZT2):
     def inicializa(self):
@@ -39,46 +102,306 @@ class Conecta4(ModeloJuegoZT2):
         return (columna for columna in range(7) if s[columna] == 0)
     
     def transicion(self, s, a, j):
-        s = list(s[:])
         for i in range(5, -1, -1):
             if s[a + 7 * i] == 0:
-                s[a + 7 * i] = j
+                celda = a + 7 * i
                 break
-        return tuple(s)
+        s2 = Estado(s[:celda] + (j,) + s[celda + 1:])
+        # Solo las líneas que pasan por la última ficha pueden ganar
+        s2.ultima = celda
+        ganador, libres = getattr(s, 'ganador', None), getattr(s, 'libres', None)
+        if ganador is None:
+            ganador, libres = self.ganancia(s), s.count(0)
+        s2.ganador = ganador or (j if any(
+            s[p] == s[q] == s[r] == j 
+            for p, q, r in LINEAS_CONECTA4_CELDA[celda]
+        ) else 0)
+        s2.libres = libres - 1
+        s2.fin = s2.ganador != 0 or s2.libres == 0
+        s2.clave = self.clave(s) ^ ZOBRIST[celda][j]
+        clave_espejo = getattr(s, 'clave_espejo', None)
+        if clave_espejo is not None:
+            s2.clave_espejo = clave_espejo ^ ZOBRIST[ESPEJO_CONECTA4[celda]][j]
+        return s2
     
     def ganancia(self, s):
-        #Verticales
-        for i in range(7):
-            for j in range(3):
-                if (s[i + 7 * j] == s[i + 7 * (j + 1)] 
-                    == s[i + 7 * (j + 2)] == s[i + 7 * (j + 3)] 
-                    != 0):
-                    return s[i + 7 * j]
-        #Horizontales
-        for i in range(6):
-            for j in range(4):
-                if (s[7 * i + j] == s[7 * i + j + 1] 
-                    == s[7 * i + j + 2] == s[7 * i + j + 3] 
-                    != 0):
-                    return s[7 * i + j]
-        #Diagonales
-        for i in range(4):
-            for j in range(3):
-                if (s[i + 7 * j] == s[i + 7 * j + 8] 
-                    == s[i + 7 * j + 16] == s[i + 7 * j + 24] 
-                    != 0):
-                    return s[i + 7 * j]
-                if (s[i + 7 * j + 3] == s[i + 7 * j + 9] 
-                    == s[i + 7 * j + 15] == s[i + 7 * j + 21] 
-                    != 0):
-                    return s[i + 7 * j + 3]
-        return 0
+        ganador = getattr(s, 'ganador', None)
+        if ganador is not None:
+            return ganador
+        return ganador_lineas(s, LINEAS_CONECTA4)
     
     def terminal(self, s):
+        fin = getattr(s, 'fin', None)
+        if fin is not None:
+            return fin
         if 0 not in s:
             return True
         return self.ganancia(s) != 0
     
+    def clave(self, s):
+        clave = getattr(s, 'clave', None)
+        return clave_zobrist(s, ZOBRIST) if clave is None else clave
+
+    def clave_espejo(self, s):
+        """
+        La llave de Zobrist del estado s reflejado de izquierda a derecha
+
+        """
+        clave = getattr(s, 'clave_espejo', None)
+        if clave is None:
+            clave = claves_simetricas(s, ZOBRIST, (ESPEJO_CONECTA4,))[0]
+        return clave
+
+    def canonica(self, s):
+        """
+        La menor de las llaves de s y de su reflejo, y 1 si es la del
+        reflejo. A partir de aquí transicion y haz_jugada mantienen las dos
+
+        """
+        clave, clave_espejo = self.clave(s), self.clave_espejo(s)
+        if isinstance(s, (Estado, Tablero)):
+            s.clave_espejo = clave_espejo
+        return (clave, 0) if clave <= clave_espejo else (clave_espejo, 1)
+
+    def jugada_canonica(self, a, g):
+        return 6 - a if g else a
+
+    def jugada_de_canonica(self, a, g):
+        return 6 - a if g else a
+
+    def tablero(self, s):
+        # Las casillas van también en celdas, una lista simple que se
+        # indexa más rápido en las evaluaciones (ver suma_lineas)
+        tablero = Tablero(s)
+        tablero.celdas = list(s)
+        tablero.ganador, tablero.libres = self.ganancia(s), s.count(0)
+        tablero.fin = tablero.ganador != 0 or tablero.libres == 0
+        tablero.clave = self.clave(s)
+        tablero.clave_espejo = getattr(s, 'clave_espejo', None)
+        return tablero
+
+    def haz_jugada(self, tablero, a, j):
+        # La primera casilla vacía desde abajo, sin crear un range por nodo
+        celda = a + 35
+        while tablero[celda] != 0:
+            celda -= 7
+        tablero[celda] = tablero.celdas[celda] = j
+        tablero.ultima = celda
+        for p, q, r in LINEAS_CONECTA4_CELDA[celda]:
+            if tablero[p] == tablero[q] == tablero[r] == j:
+                tablero.ganador = j
+                break
+        tablero.libres -= 1
+        tablero.fin = tablero.ganador != 0 or tablero.libres == 0
+        tablero.clave ^= ZOBRIST[celda][j]
+        if tablero.clave_espejo is not None:
+            tablero.clave_espejo ^= ZOBRIST[ESPEJO_CONECTA4[celda]][j]
+
+    def deshaz_jugada(self, tablero, a, j):
+        # La ficha de hasta arriba de la columna. Solo se juega en estados
+        # no terminales, así que antes de la jugada nadie había ganado
+        celda = a
+        while tablero[celda] == 0:
+            celda += 7
+        tablero[celda] = tablero.celdas[celda] = 0
+        tablero.ganador = 0
+        tablero.libres += 1
+        tablero.fin = False
+        tablero.clave ^= ZOBRIST[celda][j]
+        if tablero.clave_espejo is not None:
+            tablero.clave_espejo ^= ZOBRIST[ESPEJO_CONECTA4[celda]][j]
+
+
+class Conecta4Incremental(Conecta4):
+    """
+    Conecta 4 en el que cada estado lleva el valor de evalua_nuevo en el
+    atributo puntaje, para evaluar las hojas con evalua_incremental
+
+    Una ventana solo aporta al puntaje si todas sus casillas son del
+    mismo jugador, así que antes de la jugada las ventanas que pasan por
+    la casilla nueva (que estaba vacía) no aportan nada, y después solo
+    aportan las que tienen las demás casillas del jugador que tiró.
+
+    """
+    def transicion(self, s, a, j):
+        s2 = super().transicion(s, a, j)
+        puntaje = getattr(s, 'puntaje', None)
+        if puntaje is None:
+            puntaje = evalua_nuevo(s)
+        s2.puntaje = puntaje + j * _delta_nuevo(s, s2.ultima, j)
+        return s2
+
+    def tablero(self, s):
+        tablero = super().tablero(s)
+        tablero.puntaje = evalua_incremental(s)
+        return tablero
+
+    def haz_jugada(self, tablero, a, j):
+        super().haz_jugada(tablero, a, j)
+        # El cambio se guarda para deshacerlo sin volver a calcularlo
+        delta = j * _delta_nuevo(tablero, tablero.ultima, j)
+        tablero.pila.append(delta)
+        tablero.puntaje += delta
+
+    def deshaz_jugada(self, tablero, a, j):
+        tablero.puntaje -= tablero.pila.pop()
+        super().deshaz_jugada(tablero, a, j)
+
+
+def _delta_nuevo(s, celda, j):
+    # Lo que sube el puntaje de evalua_nuevo (con signo de j) si j tira en
+    # la casilla vacía celda de s
+    delta = 0
+    for otras, peso in DELTAS_NUEVO[celda]:
+        for i in otras:
+            if s[i] != j:
+                break
+        else:
+            delta += peso
+    return delta
+
+
+# Versión con tableros de bits
+#
+# Cada columna ocupa 7 bits (6 casillas más un bit centinela arriba),
+# con el bit 0 de cada columna en el renglón de abajo:
+#
+#  5 12 19 26 33 40 47
+#  4 11 18 25 32 39 46
+#  3 10 17 24 31 38 45
+#  2  9 16 23 30 37 44
+#  1  8 15 22 29 36 43
+#  0  7 14 21 28 35 42
+#
+# El estado es (x, o, alturas), donde x y o son los tableros de bits del
+# jugador 1 y del jugador -1, y alturas tiene prendido, para cada columna,
+# el bit de la siguiente casilla libre (el centinela si está llena).
+
+ALTO = 6
+ALTO1 = ALTO + 1
+FONDO = sum(1 << (ALTO1 * c) for c in range(7))
+TOPE = FONDO << ALTO
+LLENO = FONDO * ((1 << ALTO) - 1)
+COLUMNAS = tuple(((1 << ALTO1) - 1) << (ALTO1 * c) for c in range(7))
+
+
+def conecta4_bits(b):
+    """
+    True si el tablero de bits b tiene 4 fichas en línea
+
+    """
+    for desp in (1, ALTO1, ALTO, ALTO1 + 1):
+        m = b & (b >> desp)
+        if m & (m >> 2 * desp):
+            return True
+    return False
+
+
+def a_tupla(s):
+    """
+    Convierte un estado de Conecta4Bits en el estado de Conecta4
+
+    """
+    x, o, _ = s
+    return tuple(
+        1 if x >> (ALTO1 * (i % 7) + 5 - i // 7) & 1 else
+        -1 if o >> (ALTO1 * (i % 7) + 5 - i // 7) & 1 else 0
+        for i in range(42)
+    )
+
+
+def de_tupla(s):
+    """
+    Convierte un estado de Conecta4 en el estado de Conecta4Bits
+
+    """
+    x = o = 0
+    for i, v in enumerate(s):
+        bit = 1 << (ALTO1 * (i % 7) + 5 - i // 7)
+        if v == 1:
+            x |= bit
+        elif v == -1:
+            o |= bit
+    # Las fichas de cada columna son contiguas desde abajo, así que al
+    # sumar el fondo queda prendido el bit de la siguiente casilla libre
+    return (x, o, (x | o) + FONDO)
+
+
+class Conecta4Bits(ModeloJuegoZT2):
+    """
+    Conecta 4 con tableros de bits, intercambiable con Conecta4
+
+    """
+    def inicializa(self):
+        return ((0, 0, FONDO), 1)
+
+    def jugadas_legales(self, s, j):
+        alturas = s[2]
+        return (c for c in range(7) if not alturas & TOPE & COLUMNAS[c])
+
+    def transicion(self, s, a, j):
+        x, o, alturas = s
+        bit = alturas & COLUMNAS[a]
+        if j == 1:
+            x |= bit
+        else:
+            o |= bit
+        return (x, o, alturas + bit)
+
+    def ganancia(self, s):
+        if conecta4_bits(s[0]):
+            return 1
+        if conecta4_bits(s[1]):
+            return -1
+        return 0
+
+    def terminal(self, s):
+        x, o, _ = s
+        if x | o == LLENO:
+            return True
+        return conecta4_bits(x) or conecta4_bits(o)
+
+    def clave(self, s):
+        # Las fichas de x más las alturas identifican la posición sin
+        # colisiones y caben en 49 bits, así que no hace falta Zobrist
+        return s[0] + s[2]
+
+
+def _ventanas_bits(ventanas):
+    """
+    Las ventanas de casillas como tríos (desp, 2 * desp, inicios): cada
+    ventana empieza en un bit prendido de inicios y sigue cada desp bits
+
+    """
+    inicios = {}
+    for v in ventanas:
+        bits = sorted(ALTO1 * (i % 7) + 5 - i // 7 for i in v)
+        desp = bits[1] - bits[0]
+        inicios[desp] = inicios.get(desp, 0) | 1 << bits[0]
+    return tuple((desp, 2 * desp, m) for desp, m in sorted(inicios.items()))
+
+# Las mismas ventanas de evalua_nuevo, agrupadas por dirección
+VENTANAS_BITS_3 = _ventanas_bits(VENTANAS_NUEVO_3)
+VENTANAS_BITS_2 = _ventanas_bits(VENTANAS_NUEVO_2)
+
+
+def evalua_nuevo_bits(s):
+    """
+    evalua_nuevo para los estados de Conecta4Bits, contando las ventanas
+    de cada jugador de una dirección a la vez con corrimientos
+
+    """
+    x, o, _ = s
+    tres = dos = 0
+    for desp, desp2, inicios in VENTANAS_BITS_3:
+        tres += (x & x >> desp & x >> desp2 & inicios).bit_count()
+        tres -= (o & o >> desp & o >> desp2 & inicios).bit_count()
+    for desp, _, inicios in VENTANAS_BITS_2:
+        dos += (x & x >> desp & inicios).bit_count()
+        dos -= (o & o >> desp & inicios).bit_count()
+    return 5 * tres + dos
+
+
 def pprint_conecta4(s):
     a = [' X ' if x == 1 else ' O ' if x == -1 else '   ' 
          for x in s]
@@ -132,6 +455,15 @@ def ordena_extension(s, jugadas, jugador):
     puntajes_desc = [movimiento for movimiento, puntaje in sorted(puntajes, key=lambda x: x[1], reverse=True)]
     return puntajes_desc
 
+def ordena_extension_contexto(jugadas, jugador, estado, d, contexto):
+    """
+    ordena_extension con la interfaz con contexto, para poder usarla en negamax
+    """
+    # Con un tablero mutable se ordena sobre una copia inmutable
+    if not isinstance(estado, tuple):
+        estado = tuple(estado)
+    return ordena_extension(estado, jugadas, jugador)
+
 def ordenar_jugadas_avanzado(jugadas, jugador):
     """
     Ordena jugadas con una estrategia un poco mas avanzada
@@ -153,40 +485,7 @@ def evalua_3con(s):
     """
     Evalua el estado s para el jugador 1
     """
-    conect3 = sum(
-        1 for i in range(7) for j in range(4) 
-        if (s[i + 7 * j] == s[i + 7 * (j + 1)] 
-            == s[i + 7 * (j + 2)] == 1)
-    ) - sum(
-        1 for i in range(7) for j in range(4) 
-        if (s[i + 7 * j] == s[i + 7 * (j + 1)] 
-            == s[i + 7 * (j + 2)] == -1)
-    ) + sum(
-        1 for i in range(6) for j in range(5) 
-        if (s[7 * i + j] == s[7 * i + j + 1] 
-            == s[7 * i + j + 2] == 1)
-    ) - sum(
-        1 for i in range(6) for j in range(5) 
-        if (s[7 * i + j] == s[7 * i + j + 1] 
-            == s[7 * i + j + 2] == -1)
-    ) + sum(
-        1 for i in range(5) for j in range(4) 
-        if (s[i + 7 * j] == s[i + 7 * j + 8] 
-            == s[i + 7 * j + 16] == 1)
-    ) - sum(
-        1 for i in range(5) for j in range(4) 
-        if (s[i + 7 * j] == s[i + 7 * j + 8] 
-            == s[i + 7 * j + 16] == -1)
-    ) + sum(
-        1 for i in range(5) for j in range(4) 
-        if (s[i + 7 * j + 3] == s[i + 7 * j + 9] 
-            == s[i + 7 * j + 15] == 1)
-    ) - sum(
-        1 for i in range(5) for j in range(4) 
-        if (s[i + 7 * j + 3] == s[i + 7 * j + 9] 
-            == s[i + 7 * j + 15] == -1)
-    )
-    promedio = conect3 / (7 * 4 + 6 * 5 + 5 * 4 + 5 * 4)
+    promedio = suma_lineas(s, VENTANAS_3CON) / len(VENTANAS_3CON)
     if abs(promedio) >= 1:
         print("ERROR, evaluación fuera de rango --> ", promedio)
     return promedio
@@ -195,79 +494,25 @@ def evalua_nuevo(s):
     """
     Evalua el estado s para el jugador 1, considerando secuencias de 3 y 2
     """
-    puntaje = 0
-    
-    # Secuencias de 3, vertical, horizontal y diagonal
-    for i in range(4): 
-        for j in range(7): 
-            indice = i * 7 + j
-            if s[indice] == s[indice + 7] == s[indice + 14] == 1:
-                puntaje += 5
-            elif s[indice] == s[indice + 7] == s[indice + 14] == -1:
-                puntaje -= 5
+    return 5 * suma_lineas(s, VENTANAS_NUEVO_3) + suma_lineas(s, VENTANAS_NUEVO_2)
 
-    for i in range(6):
-        for j in range(4):
-            indice = i * 7 + j
-            if s[indice] == s[indice + 1] == s[indice + 2] == 1:
-                puntaje += 5
-            elif s[indice] == s[indice + 1] == s[indice + 2] == -1:
-                puntaje -= 5
-    
-    for i in range(3, 6):
-        for j in range(4):
-            indice = i * 7 + j
-            if s[indice] == s[indice - 6] == s[indice - 12] == 1:
-                puntaje += 5
-            elif s[indice] == s[indice - 6] == s[indice - 12] == -1:
-                puntaje -= 5
-
-    for i in range(4):
-        for j in range(5):
-            indice = i * 7 + j
-            if s[indice] == s[indice + 8] == s[indice + 16] == 1:
-                puntaje += 5
-            elif s[indice] == s[indice + 8] == s[indice + 16] == -1:
-                puntaje -= 5
-                
-    # Secuencias de 2, vertical, horizontal y diagonal
-    for i in range(5):  
-        for j in range(7):
-            indice = i * 7 + j
-            if s[indice] == s[indice + 7] == 1:
-                puntaje += 1
-            elif s[indice] == s[indice + 7] == -1:
-                puntaje -= 1
-
-    for i in range(6):  
-        for j in range(5):
-            indice = i * 7 + j
-            if s[indice] == s[indice + 1] == 1:
-                puntaje += 1
-            elif s[indice] == s[indice + 1] == -1:
-                puntaje -= 1
+def evalua_incremental(s):
+    """
+    evalua_nuevo para los estados de Conecta4Incremental, sin recorrer
+    el tablero
     
-    for i in range(4,6):
-        for j in range(5):
-            indice = i * 7 + j
-            if s[indice] == s[indice - 6] == 1:
-                puntaje += 1
-            elif s[indice] == s[indice - 6] == -1:
-                puntaje -= 1
-
-    for i in range(4):
-        for j in range(5):
-            indice = i * 7 + j
-            if s[indice] == s[indice + 8] == 1:
-                puntaje += 1
-            elif s[indice] == s[indice + 8] == -1:
-                puntaje -= 1
-
-    return puntaje
+    """
+    puntaje = getattr(s, 'puntaje', None)
+    return evalua_nuevo(s) if puntaje is None else puntaje
     
 if __name__ == '__main__':
+    import os
+    from conect4_libro import LibroAperturas, ARCHIVO
+    from conect4_final import FinalExacto
 
     modelo = Conecta4()
+    # Si ya se construyó el libro de aperturas, los jugadores lo usan
+    libro = LibroAperturas(ARCHIVO) if os.path.exists(ARCHIVO) else None
     print("="*40 + "\n" + "EL JUEGO DE CONECTA 4".center(40) + "\n" + "="*40)
     
     jugs = []
@@ -286,16 +531,18 @@ if __name__ == '__main__':
             d = None
             while type(d) != int or d < 1:
                 d = int(input("Profundidad: "))
-            jugs.append(lambda juego, s, j: jugador_negamax(
-                juego, s, j, ordena=ordenar_jugadas_avanzado, evalua=evalua_nuevo, d=d)
-            )
+            jugs.append(JugadorNegamax(
+                ordena=ordenar_jugadas_avanzado, evalua=evalua_nuevo, d=d,
+                libro=libro, final=FinalExacto()
+            ))
         else:
             t = None
             while type(t) != int or t < 1:
                 t = int(input("Tiempo: "))
-            jugs.append(lambda juego, s, j: minimax_iterativo(
-                juego, s, j, ordena=ordenar_jugadas_avanzado, evalua=evalua_nuevo, tiempo=t)
-            )
+            jugs.append(JugadorNegamax(
+                ordena=ordenar_jugadas_avanzado, evalua=evalua_nuevo, tiempo=t,
+                libro=libro, final=FinalExacto()
+            ))
         
     g, s_final = juega_dos_jugadores(modelo, jugs[0], jugs[1])
     print("\nSE ACABO EL JUEGO\n")
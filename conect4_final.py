@@ -0,0 +1,215 @@
+"""
+Solución exacta de finales de conecta 4
+
+Cuando quedan pocas casillas vacías se puede buscar hasta el final del
+juego en lugar de evaluar con una heurística. La búsqueda se hace con los
+tableros de bits de conect4 y devuelve un puntaje exacto para el jugador
+que mueve:
+
+    puntaje > 0  gana, y entre más grande más pronto gana
+    puntaje = 0  empate
+    puntaje < 0  pierde, y entre más chico más pronto pierde
+
+Si el jugador gana poniendo una ficha cuando hay v casillas vacías, su
+puntaje es (v + 1) // 2, así que el mejor juego de los dos lados da la
+línea más corta para ganar (y la más larga para perder).
+
+El valor exacto se encuentra con búsquedas de ventana nula alrededor de
+un valor de prueba, estrechando el intervalo posible como una búsqueda
+binaria. En cada nodo se detectan las jugadas forzadas (si el rival
+amenaza ganar hay que tapar, y si amenaza en dos lugares ya se perdió),
+no se juega debajo de una casilla que gana el rival, y se guardan las
+cotas en una tabla de transposición con la llave del tablero de bits.
+
+Para que un jugador lo use automáticamente en el final:
+
+    jugador = JugadorNegamax(ordena=..., evalua=..., d=8, final=FinalExacto(16))
+
+"""
+
+from conect4 import ALTO, ALTO1, FONDO, LLENO, COLUMNAS
+from conect4 import de_tupla
+from minimax import EXACTO, INFERIOR, SUPERIOR
+
+# Primero las columnas del centro
+ORDEN = (3, 2, 4, 1, 5, 0, 6)
+
+
+def ganadoras(p, mascara):
+    """
+    Casillas vacías (no necesariamente jugables) que completan 4 en línea
+    para las fichas p
+
+    """
+    # Vertical: solo puede completarse arriba
+    r = (p << 1) & (p << 2) & (p << 3)
+    for desp in (ALTO1, ALTO, ALTO1 + 1):
+        m = (p << desp) & (p << 2 * desp)
+        r |= m & (p << 3 * desp)
+        r |= m & (p >> desp)
+        m = (p >> desp) & (p >> 2 * desp)
+        r |= m & (p << desp)
+        r |= m & (p >> 3 * desp)
+    return r & (LLENO ^ mascara)
+
+
+def _negamax_final(p, o, mascara, vacias, alpha, beta, transp, stats):
+    """
+    Puntaje exacto si está entre alpha y beta, y si no una cota, para el
+    jugador con las fichas p
+
+    """
+    if stats != None:
+        stats.nodos += 1
+    posibles = (mascara + FONDO) & LLENO
+    if ganadoras(p, mascara) & posibles:
+        return (vacias + 1) // 2
+    if vacias <= 1:
+        return 0
+
+    # Jugadas forzadas
+    amenazas = ganadoras(o, mascara)
+    forzadas = posibles & amenazas
+    if forzadas:
+        if forzadas & (forzadas - 1):
+            return -(vacias // 2)
+        posibles = forzadas
+    posibles &= ~(amenazas >> 1)
+    if not posibles:
+        return -(vacias // 2)
+
+    # Con nadie ganando ahora, lo mejor es ganar en la siguiente jugada
+    alpha0, beta = alpha, min(beta, (vacias - 1) // 2)
+    alpha = max(alpha, -((vacias - 2) // 2))
+    llave = p + mascara + FONDO
+    entrada = transp.get(llave)
+    if entrada != None:
+        v, cota = entrada
+        if stats != None:
+            stats.tt_aciertos += 1
+        if cota == EXACTO:
+            return v
+        if cota == INFERIOR:
+            alpha = max(alpha, v)
+        else:
+            beta = min(beta, v)
+    if alpha >= beta:
+        return alpha
+
+    # Primero las jugadas que dejan más casillas ganadoras
+    jugadas = sorted(
+        (bit for bit in (posibles & COLUMNAS[c] for c in ORDEN) if bit),
+        key=lambda bit: -(ganadoras(p | bit, mascara | bit).bit_count()),
+    )
+    v = -1e10
+    for bit in jugadas:
+        v = max(v, -_negamax_final(
+            o, p | bit, mascara | bit, vacias - 1, -beta, -alpha, transp, stats
+        ))
+        if v >= beta:
+            break
+        alpha = max(alpha, v)
+
+    transp[llave] = (
+        v, INFERIOR if v >= beta else SUPERIOR if v <= alpha0 else EXACTO
+    )
+    return v
+
+
+def _bits(s, jugador):
+    if len(s) != 3:
+        s = de_tupla(s)
+    x, o, _ = s
+    mascara = x | o
+    p, o = (x, o) if jugador == 1 else (o, x)
+    return p, o, mascara, 7 * ALTO - mascara.bit_count()
+
+
+def puntaje_final(s, jugador, transp=None, stats=None):
+    """
+    Puntaje exacto del estado no terminal s para jugador, con búsquedas
+    de ventana nula sobre el intervalo de puntajes posibles
+
+    """
+    transp = {} if transp == None else transp
+    p, o, mascara, vacias = _bits(s, jugador)
+    minimo, maximo = -(vacias // 2), (vacias + 1) // 2
+    while minimo < maximo:
+        medio = minimo + (maximo - minimo) // 2
+        # Primero se prueba cerca de 0, donde cortan más las búsquedas
+        if medio <= 0 and minimo // 2 < medio:
+            medio = minimo // 2
+        elif medio >= 0 and maximo // 2 > medio:
+            medio = maximo // 2
+        v = _negamax_final(p, o, mascara, vacias, medio, medio + 1, transp, stats)
+        if v <= medio:
+            maximo = v
+        else:
+            minimo = v
+    return minimo
+
+
+def resuelve_final(s, jugador, transp=None, stats=None):
+    """
+    Resuelve el final desde el estado no terminal s (de Conecta4 o de
+    Conecta4Bits) para jugador
+
+    Devuelve (traza, puntaje) donde traza es la línea de juego perfecto
+    (las columnas hasta el final del juego) y puntaje el puntaje exacto
+
+    """
+    transp = {} if transp == None else transp
+    puntaje = puntaje_final(s, jugador, transp, stats)
+    p, o, mascara, vacias = _bits(s, jugador)
+    traza, v = [], puntaje
+    while True:
+        posibles = (mascara + FONDO) & LLENO
+        if not posibles:
+            break
+        ganan = ganadoras(p, mascara) & posibles
+        if ganan:
+            traza.append(_columna(ganan & -ganan))
+            break
+        # La jugada cuyo valor exacto es v (el hijo vale a lo más -v)
+        for c in ORDEN:
+            bit = posibles & COLUMNAS[c]
+            if bit and -_negamax_final(
+                o, p | bit, mascara | bit, vacias - 1, -v, -v + 1, transp, stats
+            ) >= v:
+                break
+        traza.append(c)
+        p, o, mascara, vacias, v = o, p | bit, mascara | bit, vacias - 1, -v
+    return traza, puntaje
+
+
+def _columna(bit):
+    return (bit.bit_length() - 1) // ALTO1
+
+
+def resultado(puntaje):
+    """
+    1 si el puntaje es de victoria, 0 si es empate y -1 si es de derrota
+
+    """
+    return (puntaje > 0) - (puntaje < 0)
+
+
+class FinalExacto:
+    """
+    Resuelve exactamente los finales de conecta 4 con a lo más vacias
+    casillas vacías
+
+    Se usa como final de JugadorNegamax: final(juego, estado, jugador)
+    devuelve la mejor jugada, o None si todavía no es el final. Conserva
+    su tabla de transposición entre jugadas.
+
+    """
+    def __init__(self, vacias=16):
+        self.vacias = vacias
+        self.transp = {}
+
+    def __call__(self, juego, estado, jugador):
+        if _bits(estado, jugador)[3] > self.vacias:
+            return None
+        traza, _ = resuelve_final(estado, jugador, self.transp)
+        return traza[0]
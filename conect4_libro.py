@@ -0,0 +1,166 @@
+"""
+Libro de aperturas para conecta 4
+
+El libro se construye fuera de línea buscando a profundidad fija la mejor
+jugada de cada posición alcanzable en las primeras N jugadas, y se guarda
+en un archivo binario con registros de tamaño fijo ordenados por llave:
+
+    llave (8 bytes, entero sin signo) | jugada (1 byte)
+
+La llave de una posición es la del tablero de bits (las fichas del
+jugador 1 más el bit de la siguiente casilla libre de cada columna), que
+es única. Se guardan las dos orientaciones de cada posición por separado,
+porque evalua_nuevo no es simétrico y la jugada reflejada de una posición
+no siempre es la que encuentra la búsqueda en su reflejo.
+
+Los jugadores abren el archivo con mmap y buscan la posición con búsqueda
+binaria, sin cargar el libro en memoria. Para usarlo:
+
+    libro = LibroAperturas('libro_conecta4.bin')
+    jugador = JugadorNegamax(ordena=..., evalua=..., d=8, libro=libro)
+
+y para construirlo:
+
+    python conect4_libro.py --jugadas 4 --profundidad 8
+
+"""
+
+import mmap
+import os
+import struct
+from time import perf_counter
+
+from conect4 import Conecta4, de_tupla, a_tupla, FONDO
+from conect4 import ordenar_jugadas_avanzado, evalua_nuevo
+from minimax import negamax
+
+REGISTRO = struct.Struct('<QB')
+# Por omisión el libro va junto a este módulo, no en el directorio actual
+ARCHIVO = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'libro_conecta4.bin'
+)
+
+
+def llave(s):
+    """
+    La llave del libro del estado s (tupla o tablero de bits)
+
+    """
+    x, o, _ = de_tupla(a_tupla(s) if len(s) == 3 else s)
+    return x + (x | o) + FONDO
+
+
+def posiciones(jugadas):
+    """
+    Las posiciones no terminales (estado, jugador) alcanzables en a lo
+    más jugadas jugadas desde el inicio
+
+    """
+    juego = Conecta4()
+    s, j = juego.inicializa()
+    nivel, vistas = {llave(s): (s, j)}, {}
+    for _ in range(jugadas + 1):
+        vistas.update(nivel)
+        siguiente = {}
+        for s, j in nivel.values():
+            if juego.terminal(s):
+                continue
+            for a in juego.jugadas_legales(s, j):
+                s2 = juego.transicion(s, a, j)
+                k = llave(s2)
+                if k not in vistas and k not in siguiente:
+                    siguiente[k] = (s2, -j)
+        nivel = siguiente
+    return {
+        k: (s, j) for k, (s, j) in vistas.items() if not juego.terminal(s)
+    }
+
+
+def construye_libro(
+    archivo=ARCHIVO, jugadas=4, d=8,
+    ordena=ordenar_jugadas_avanzado, evalua=evalua_nuevo
+    ):
+    """
+    Construye el libro de las posiciones hasta jugadas jugadas, buscando
+    cada una con negamax a profundidad d, y lo guarda en archivo. Cada
+    búsqueda empieza con su propia tabla de transposición, para que la
+    jugada sea la misma que la de una búsqueda directa a profundidad d
+
+    Devuelve el número de posiciones y el tiempo que tomó
+
+    """
+    t0 = perf_counter()
+    juego = Conecta4()
+    registros = []
+    for k, (s, j) in sorted(posiciones(jugadas).items()):
+        traza, _ = negamax(juego, s, j, ordena=ordena, d=d, evalua=evalua)
+        registros.append(REGISTRO.pack(k, traza[0]))
+    with open(archivo, 'wb') as f:
+        f.write(b''.join(registros))
+    return len(registros), perf_counter() - t0
+
+
+class LibroAperturas:
+    """
+    Libro de aperturas de conecta 4 leído con mmap
+
+    Se usa como libro de JugadorNegamax: libro(juego, estado, jugador)
+    devuelve la jugada del libro o None si la posición no está.
+
+    """
+    def __init__(self, archivo=ARCHIVO):
+        self.archivo = archivo
+        self._abre()
+
+    def _abre(self):
+        with open(self.archivo, 'rb') as f:
+            self.datos = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.n = len(self.datos) // REGISTRO.size
+
+    def __len__(self):
+        return self.n
+
+    # El mmap no se puede mandar a otros procesos, se vuelve a abrir
+    def __getstate__(self):
+        return {'archivo': self.archivo}
+
+    def __setstate__(self, estado):
+        self.archivo = estado['archivo']
+        self._abre()
+
+    def busca(self, k):
+        """
+        La jugada guardada con la llave k, o None si no está
+
+        """
+        bajo, alto = 0, self.n
+        while bajo < alto:
+            medio = (bajo + alto) // 2
+            llave_m, jugada = REGISTRO.unpack_from(
+                self.datos, medio * REGISTRO.size
+            )
+            if llave_m == k:
+                return jugada
+            if llave_m < k:
+                bajo = medio + 1
+            else:
+                alto = medio
+        return None
+
+    def __call__(self, juego, estado, jugador):
+        return self.busca(llave(estado))
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Construye el libro de aperturas de conecta 4"
+    )
+    parser.add_argument('--jugadas', type=int, default=4)
+    parser.add_argument('--profundidad', type=int, default=8)
+    parser.add_argument('--archivo', default=ARCHIVO)
+    args = parser.parse_args()
+
+    n, t = construye_libro(args.archivo, args.jugadas, args.profundidad)
+    print(f"{n} posiciones en {t:.1f}s, guardadas en {args.archivo}")
@@ -0,0 +1,90 @@
+"""
+Evaluación vectorizada de conecta 4 con NumPy
+
+Las funciones evalua_3con y evalua_nuevo de conect4.py recorren el
+tablero con ciclos anidados en cada hoja. Aquí se precalcula una sola vez
+la matriz con los índices de todas las ventanas (de 2, 3 o 4 casillas)
+que revisa cada evaluador, junto con su peso, y la evaluación se reduce a
+unas cuantas operaciones de NumPy:
+
+    suma = tableros[:, indices].sum(axis=2)
+    puntaje = ((suma == L) - (suma == -L)) @ pesos
+
+Una ventana de L casillas con valores en {-1, 0, 1} es toda del jugador 1
+si y solo si suma L, y toda del jugador -1 si y solo si suma -L.
+
+Las ventanas se generan con los mismos ciclos que los evaluadores
+originales (incluyendo las ventanas que esos ciclos omiten o la que se
+sale por la orilla en las diagonales de evalua_3con), así que los
+resultados son idénticos.
+
+Las funciones reciben un estado (42 casillas) o un arreglo de (N, 42)
+estados, y en ese caso devuelven un arreglo de N evaluaciones. Para una
+sola posición dentro de negamax los ciclos de Python suelen ser más
+rápidos; la ganancia está en evaluar lotes grandes de posiciones.
+
+Requiere NumPy, que no es necesario para el resto del proyecto.
+
+"""
+
+import numpy as np
+
+from conect4 import VENTANAS_3CON, VENTANAS_NUEVO
+
+
+def matriz_ventanas(ventanas):
+    """
+    Convierte una lista de pares (ventana, peso) en una lista de pares
+    (índices, pesos) de NumPy, uno por cada longitud de ventana
+
+    """
+    por_longitud = {}
+    for v, peso in ventanas:
+        indices, pesos = por_longitud.setdefault(len(v), ([], []))
+        indices.append(v)
+        pesos.append(peso)
+    return [
+        (np.array(indices, dtype=np.intp), np.array(pesos))
+        for indices, pesos in por_longitud.values()
+    ]
+
+
+def evalua_lote(s, matriz):
+    """
+    Evalúa un estado o un arreglo (N, 42) de estados con la matriz de
+    ventanas dada por matriz_ventanas
+
+    """
+    tableros = np.asarray(s, dtype=np.int8)
+    uno = tableros.ndim == 1
+    tableros = tableros.reshape(-1, 42)
+    puntaje = 0
+    for indices, pesos in matriz:
+        L = indices.shape[1]
+        suma = tableros[:, indices].sum(axis=2)
+        puntaje = puntaje + ((suma == L).astype(pesos.dtype) - (suma == -L)) @ pesos
+    return puntaje[0].item() if uno else puntaje
+
+
+MATRIZ_3CON = matriz_ventanas([(v, 1) for v in VENTANAS_3CON])
+MATRIZ_NUEVO = matriz_ventanas(VENTANAS_NUEVO)
+
+
+def evalua_3con_vec(s):
+    """
+    Igual que evalua_3con, para un estado o un lote de estados
+
+    """
+    return evalua_lote(s, MATRIZ_3CON) / len(MATRIZ_3CON[0][0])
+
+
+def evalua_nuevo_vec(s, pesos=(5, 1)):
+    """
+    Igual que evalua_nuevo, para un estado o un lote de estados. Con
+    pesos se pueden cambiar los pesos de las secuencias de 3 y de 2
+
+    """
+    matriz = MATRIZ_NUEVO if pesos == (5, 1) else matriz_ventanas(
+        [(v, pesos[0] if len(v) == 3 else pesos[1]) for v, _ in VENTANAS_NUEVO]
+    )
+    return evalua_lote(s, matriz)
@@ -0,0 +1,33 @@
+"""
+Utilidades comunes de las pruebas: copias de estados sin atributos y
+partidas al azar
+
+"""
+
+
+def copia(s):
+    """
+    El estado s como tupla simple, sin los atributos que calcula
+    transicion, para que el juego tenga que calcularlos desde cero
+
+    """
+    if isinstance(s[0], int):
+        return tuple(s)
+    return (tuple(s[0]), s[1], s[2])
+
+
+def partida(juego, rnd, s=None, j=None):
+    """
+    Las posiciones de una partida al azar desde s (o desde el inicio)
+    como ternas (s, j, a), con a la jugada que se hace a continuación
+    (None en la posición terminal)
+
+    """
+    if s == None:
+        s, j = juego.inicializa()
+    while not juego.terminal(s):
+        a = rnd.choice(list(juego.jugadas_legales(s, j)))
+        yield s, j, a
+        s = juego.transicion(s, a, j)
+        j = -j
+    yield s, j, None
@@ -3,10 +3,25 @@ El juego del gato para ilustrar los modelos de juegos
 
 """
 
+import os
+
 from juegos_simplificado import ModeloJuegoZT2
+from juegos_simplificado import Estado, Tablero
+from juegos_simplificado import zobrist, clave_zobrist, claves_simetricas
 from juegos_simplificado import juega_dos_jugadores
 from juegos_simplificado import minimax
+from lineas import LINEAS_GATO, SIMETRIAS_GATO, ganador_lineas, inversa
 from minimax import jugador_negamax
+from solucion import JugadorTabla
+
+ZOBRIST = zobrist(9)
+INVERSAS = tuple(inversa(simetria) for simetria in SIMETRIAS_GATO)
+# Lo que cambia cada una de las 8 llaves simétricas cuando j juega en a
+CAMBIO_CLAVES = tuple(
+    {j: tuple(ZOBRIST[simetria[a]][j] for simetria in SIMETRIAS_GATO)
+     for j in (1, -1)}
+    for a in range(9)
+)
 
 class Gato(ModeloJuegoZT2):
     """
@@ -34,43 +49,96 @@ class Gato(ModeloJuegoZT2):
         para el jugador j
 
         """
-        s = list(s[:])
-        s[a] = j
-        return tuple(s)
+        s2 = Estado(s[:a] + (j,) + s[a + 1:])
+        claves = getattr(s, 'claves', None)
+        if claves is None:
+            s2.clave = self.clave(s) ^ ZOBRIST[a][j]
+        else:
+            # Si ya se usan las simetrías, una llave por cada una
+            s2.claves = _cambia_claves(claves, a, j)
+            s2.clave = s2.claves[0]
+        return s2
     
     def terminal(self, s):
         """
         Devuelve True si es terminal el estado actual,
 
         """
-        if 0 not in s:
-            return True
-        if s[0] == s[4] == s[8] != 0:
-            return True
-        if s[2] == s[4] == s[6] != 0:
-            return True
-        for i in range(3):
-            if s[3 * i] == s[3 * i + 1] == s[3 * i + 2] != 0:
-                return True
-            if s[i] == s[i + 3] == s[i + 6] != 0:
-                return True
-        return False
+        return 0 not in s or ganador_lineas(s, LINEAS_GATO) != 0
 
     def ganancia(self, s):
         """
         Devuelve la ganancia para el jugador 1 en el estado terminal s
 
         """
-        if s[0] == s[4] == s[8] != 0:
-            return s[0]
-        if s[2] == s[4] == s[6] != 0:
-            return s[2]
-        for i in range(3):
-            if s[3 * i] == s[3 * i + 1] == s[3 * i + 2] != 0:
-                return s[3 * i]
-            if s[i] == s[i + 3] == s[i + 6] != 0:
-                return s[i]
-        return 0    
+        return ganador_lineas(s, LINEAS_GATO)
+    
+    def clave(self, s):
+        """
+        Devuelve la llave de Zobrist del estado s
+
+        """
+        clave = getattr(s, 'clave', None)
+        return clave_zobrist(s, ZOBRIST) if clave is None else clave
+
+    def claves(self, s):
+        """
+        Devuelve las llaves de Zobrist del estado s transformado con cada
+        una de las 8 simetrías del tablero
+
+        """
+        claves = getattr(s, 'claves', None)
+        if claves is None:
+            claves = claves_simetricas(s, ZOBRIST, SIMETRIAS_GATO)
+        return claves
+
+    def canonica(self, s):
+        """
+        La menor de las llaves de las simetrías de s, y la simetría que la da.
+        A partir de aquí transicion y haz_jugada mantienen las 8 llaves
+
+        """
+        claves = self.claves(s)
+        if isinstance(s, (Estado, Tablero)):
+            s.claves = claves
+        g = min(range(8), key=claves.__getitem__)
+        return claves[g], g
+
+    def jugada_canonica(self, a, g):
+        return SIMETRIAS_GATO[g][a]
+
+    def jugada_de_canonica(self, a, g):
+        return INVERSAS[g][a]
+
+    def tablero(self, s):
+        """
+        Tablero mutable con la llave de Zobrist de s, y las 8 llaves de las
+        simetrías si s ya las lleva
+
+        """
+        tablero = Tablero(s)
+        tablero.clave = self.clave(s)
+        tablero.claves = getattr(s, 'claves', None)
+        return tablero
+
+    def haz_jugada(self, tablero, a, j):
+        tablero[a] = j
+        tablero.clave ^= ZOBRIST[a][j]
+        if tablero.claves is not None:
+            tablero.claves = _cambia_claves(tablero.claves, a, j)
+
+    def deshaz_jugada(self, tablero, a, j):
+        tablero[a] = 0
+        tablero.clave ^= ZOBRIST[a][j]
+        if tablero.claves is not None:
+            tablero.claves = _cambia_claves(tablero.claves, a, j)
+
+
+def _cambia_claves(claves, a, j):
+    # Con xor, la misma operación hace y deshace la jugada
+    return tuple(
+        clave ^ cambio for clave, cambio in zip(claves, CAMBIO_CLAVES[a][j])
+    )
     
 def pprint_gato(s):
     """
@@ -100,6 +168,13 @@ def jugador_manual_gato(juego, s, j):
         jugada = int(input("Jugada: "))
     return jugada
 
+# Jugador perfecto: la tabla con la solución del gato se construye
+# (y se guarda junto a este módulo) la primera vez que juega
+ARCHIVO_SOLUCION = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'gato_solucion.pkl'
+)
+jugador_tabla_gato = JugadorTabla(Gato(), ARCHIVO_SOLUCION)
+
 def jugador_minimax_gato(juego, s, j):
     """
     Jugador minimax para el juego del gato
@@ -122,10 +197,12 @@ def juega_gato(jugador='X'):
     
     if jugador == 'X':
         #g, s = juega_dos_jugadores(juego, jugador_manual_gato, jugador_minimax_gato)
-        g, s = juega_dos_jugadores(juego, jugador_manual_gato, jugador_negamax)
+        #g, s = juega_dos_jugadores(juego, jugador_manual_gato, jugador_negamax)
+        g, s = juega_dos_jugadores(juego, jugador_manual_gato, jugador_tabla_gato)
     else:
         #g, s = juega_dos_jugadores(juego, jugador_minimax_gato, jugador_manual_gato)
-        g, s = juega_dos_jugadores(juego, jugador_negamax, jugador_manual_gato)
+        #g, s = juega_dos_jugadores(juego, jugador_negamax, jugador_manual_gato)
+        g, s = juega_dos_jugadores(juego, jugador_tabla_gato, jugador_manual_gato)
     
     print("\nSE ACABO EL JUEGO\n")
     pprint_gato(s)   
@@ -5,7 +5,33 @@ Vamos a usar una orientación funcional en este modulo
 
 """
 
-from random import shuffle
+from random import shuffle, Random
+
+
+class Estado(tuple):
+    """
+    Tupla que además puede cargar información calculada al generar el
+    estado (última jugada, ganador, etc.) como atributos.
+    
+    Se compara y se hashea igual que la tupla que contiene, así que
+    puede usarse en cualquier lugar donde se espere el estado original.
+    
+    """
+    pass
+
+
+class Tablero(list):
+    """
+    Estado mutable sobre el que se hacen y deshacen jugadas en su lugar
+    (ver ModeloJuegoZT2.tablero). Como Estado, carga como atributos la
+    información calculada, y en pila se guarda lo necesario para
+    deshacer las jugadas.
+    
+    """
+    def __init__(self, s):
+        super().__init__(s)
+        self.pila = []
+
     
 class ModeloJuegoZT2:
     """
@@ -53,6 +79,106 @@ class ModeloJuegoZT2:
         
         """
         raise NotImplementedError("Hay que desarrollar este método, pues")
+    
+    def clave(self, s):
+        """
+        Devuelve la llave con la que se guarda el estado s en una tabla
+        de transposición. Por omisión es el mismo estado, pero los juegos
+        pueden devolver una llave de Zobrist que actualizan en transicion
+        
+        """
+        return s
+
+    def canonica(self, s):
+        """
+        Devuelve (clave, g) donde clave es la misma para todos los estados
+        simétricos a s y g es la simetría que lleva a s al estado canónico.
+        Por omisión el juego no tiene simetrías y g es None
+        
+        """
+        return self.clave(s), None
+    
+    def jugada_canonica(self, a, g):
+        """
+        La jugada a en s vista en el estado canónico (según g)
+        
+        """
+        return a
+    
+    def jugada_de_canonica(self, a, g):
+        """
+        La jugada a del estado canónico vista en s (según g)
+        
+        """
+        return a
+
+    def tablero(self, s):
+        """
+        Devuelve una copia mutable (un Tablero) del estado s sobre la que 
+        se hacen y deshacen jugadas con haz_jugada y deshaz_jugada, o None
+        si el juego no las implementa y hay que usar transicion. 
+        
+        El tablero se tiene que poder usar como estado en jugadas_legales,
+        terminal, ganancia, clave y en las funciones de evaluación.
+        
+        """
+        return None
+    
+    def haz_jugada(self, tablero, a, j):
+        """
+        Realiza en su lugar la jugada a del jugador j en el tablero
+        
+        """
+        raise NotImplementedError("Hay que desarrollar este método, pues")
+    
+    def deshaz_jugada(self, tablero, a, j):
+        """
+        Deshace la jugada a del jugador j, que tiene que ser la última que
+        se hizo en el tablero
+        
+        """
+        raise NotImplementedError("Hay que desarrollar este método, pues")
+
+
+def zobrist(n, semilla=0):
+    """
+    Tabla de Zobrist para n casillas: una llave aleatoria de 64 bits
+    por casilla y por jugador, tal que z[casilla][jugador]
+    
+    """
+    rnd = Random(semilla)
+    return tuple(
+        {1: rnd.getrandbits(64), -1: rnd.getrandbits(64)} for _ in range(n)
+    )
+
+
+def clave_zobrist(s, z):
+    """
+    Calcula desde cero la llave de Zobrist de un tablero plano s
+    con la tabla z
+    
+    """
+    clave = 0
+    for i, x in enumerate(s):
+        if x != 0:
+            clave ^= z[i][x]
+    return clave
+
+
+def claves_simetricas(s, z, simetrias):
+    """
+    Las llaves de Zobrist de un tablero plano s transformado con cada
+    simetría (permutaciones donde la casilla i va a dar a simetria[i])
+    
+    """
+    claves = []
+    for simetria in simetrias:
+        clave = 0
+        for i, x in enumerate(s):
+            if x != 0:
+                clave ^= z[simetria[i]][x]
+        claves.append(clave)
+    return tuple(claves)
 
 
 def juega_dos_jugadores(juego, jugador1, jugador2):
@@ -0,0 +1,142 @@
+"""
+Tablas de líneas para los juegos de hacer línea (gato, conecta 4, super gato)
+
+El tablero se representa como una tupla con las casillas por renglones,
+de forma que la casilla (r, c) de un tablero de m columnas es r * m + c.
+Las tablas se construyen una sola vez al importar el módulo y son tuplas
+de tuplas de índices, así que no se pueden modificar por accidente. Las
+simetrías de cada tablero se dan también como permutaciones de casillas.
+
+Con los valores de las casillas en {-1, 0, 1}, una línea es de un jugador
+si todas sus casillas valen lo mismo, y se puede sumar directamente su
+primera casilla porque si están vacías suman 0.
+
+"""
+
+DIRECCIONES = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+
+def lineas_tablero(renglones, columnas, largo):
+    """
+    Todas las líneas de largo casillas (horizontales, verticales y
+    diagonales) en un tablero de renglones x columnas
+
+    """
+    lineas = []
+    for dr, dc in DIRECCIONES:
+        for r in range(renglones):
+            for c in range(columnas):
+                celdas = [(r + k * dr, c + k * dc) for k in range(largo)]
+                if all(0 <= rr < renglones and 0 <= cc < columnas
+                       for rr, cc in celdas):
+                    lineas.append(tuple(rr * columnas + cc for rr, cc in celdas))
+    return tuple(lineas)
+
+
+def lineas_por_celda(lineas, n):
+    """
+    Para cada una de las n casillas, las líneas que pasan por ella dadas
+    por las otras casillas de la línea
+
+    """
+    return tuple(
+        tuple(tuple(i for i in linea if i != celda)
+              for linea in lineas if celda in linea)
+        for celda in range(n)
+    )
+
+
+def simetrias_cuadrado(n):
+    """
+    Las 8 simetrías de un tablero de n x n (rotaciones y reflejos) como
+    permutaciones: la casilla c va a dar a la casilla simetria[c]. La
+    primera es la identidad
+
+    """
+    def transforma(r, c, k):
+        # k = 0..3 rotaciones de 90 grados, k = 4..7 además reflejadas
+        if k >= 4:
+            r, c = r, n - 1 - c
+        for _ in range(k % 4):
+            r, c = c, n - 1 - r
+        return r * n + c
+    return tuple(
+        tuple(transforma(i // n, i % n, k) for i in range(n * n))
+        for k in range(8)
+    )
+
+
+def espejo(renglones, columnas):
+    """
+    La reflexión de izquierda a derecha de un tablero de renglones x
+    columnas como permutación de las casillas
+
+    """
+    return tuple(
+        (i // columnas) * columnas + columnas - 1 - i % columnas
+        for i in range(renglones * columnas)
+    )
+
+
+def inversa(permutacion):
+    """
+    La permutación inversa
+
+    """
+    inv = [0] * len(permutacion)
+    for i, p in enumerate(permutacion):
+        inv[p] = i
+    return tuple(inv)
+
+
+def ganador_lineas(s, lineas):
+    """
+    El jugador que tiene completa alguna de las líneas en s, o 0 si no hay
+
+    """
+    if len(lineas[0]) == 3:
+        for a, b, c in lineas:
+            if s[a] == s[b] == s[c] != 0:
+                return s[a]
+        return 0
+    for linea in lineas:
+        x = s[linea[0]]
+        if x != 0 and all(s[i] == x for i in linea[1:]):
+            return x
+    return 0
+
+
+def suma_lineas(s, lineas):
+    """
+    Número de líneas completas del jugador 1 menos número de líneas
+    completas del jugador -1 en s (todas las líneas del mismo largo)
+
+    """
+    # Los tableros mutables (Tablero) llevan sus casillas también en una
+    # lista simple, que se indexa bastante más rápido que una subclase
+    s = getattr(s, 'celdas', s)
+    # Con ciclos en lugar de sum no se crea un generador en cada hoja
+    largo, total = len(lineas[0]), 0
+    if largo == 2:
+        for a, b in lineas:
+            if s[a] == s[b]:
+                total += s[a]
+        return total
+    if largo == 3:
+        for a, b, c in lineas:
+            if s[a] == s[b] == s[c]:
+                total += s[a]
+        return total
+    return sum(
+        s[linea[0]] for linea in lineas
+        if all(s[i] == s[linea[0]] for i in linea[1:])
+    )
+
+
+LINEAS_GATO = lineas_tablero(3, 3, 3)
+LINEAS_GATO_CELDA = lineas_por_celda(LINEAS_GATO, 9)
+SIMETRIAS_GATO = simetrias_cuadrado(3)
+
+LINEAS_CONECTA4 = lineas_tablero(6, 7, 4)
+LINEAS_CONECTA4_CELDA = lineas_por_celda(LINEAS_CONECTA4, 42)
+ESPEJO_CONECTA4 = espejo(6, 7)
@@ -8,14 +8,197 @@ Modulo con el minimax con algunos los poderes
     5- Tablas de transposicion
     6- Trazabilidad
 """
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from inspect import signature
+from multiprocessing import Array, Value
 from random import shuffle
 from time import time
 
+# Tipos de valor guardados en la tabla de transposición
+EXACTO, INFERIOR, SUPERIOR = 0, 1, 2
+
+# Ancho de las ventanas nulas del PVS (las evaluaciones pueden ser reales)
+VENTANA_NULA = 1e-6
+
+
+class TablaTransposicion(dict):
+    """
+    Tabla de transposición que puede durar todo un juego
+    
+    Cada búsqueda nueva (típicamente cada jugada) es una generación más
+    vieja que la anterior, y cada entrada lleva la generación en que se
+    guardó (consultarla no la renueva). Cuando la tabla rebasa su capacidad
+    se tiran las entradas que no se guardaron ni en la generación actual
+    ni en la anterior.
+    
+    """
+    def __init__(self, capacidad=1000000):
+        super().__init__()
+        self.capacidad = capacidad
+        self.edad = 0
+    
+    def envejece(self):
+        """
+        Empieza una generación nueva, tirando entradas viejas si hace falta
+        
+        """
+        self.edad += 1
+        if len(self) > self.capacidad:
+            viejas = [k for k, e in self.items() if e[4] < self.edad - 1]
+            for k in viejas:
+                del self[k]
+
+
+class TiempoAgotado(Exception):
+    """
+    Se lanza desde negamax cuando el reloj se queda sin tiempo.
+    
+    En parcial queda el mejor resultado (traza, valor) que alcanzó a 
+    encontrar la raíz, o None si no terminó de revisar ninguna jugada
+    
+    """
+    parcial = None
+
+
+class Reloj:
+    """
+    Límite de tiempo duro para negamax, que se revisa cada cierto
+    número de nodos para no llamar a time() en todos
+    
+    """
+    def __init__(self, tiempo, cada=16):
+        self.limite = time() + tiempo
+        self.cada = cada
+        self.cuenta = cada
+    
+    def revisa(self):
+        self.cuenta -= 1
+        if self.cuenta == 0:
+            self.cuenta = self.cada
+            if time() >= self.limite:
+                raise TiempoAgotado()
+
+
+def acepta_contexto(ordena):
+    """
+    True si ordena usa la interfaz con contexto
+    ordena(jugadas, jugador, estado, d, contexto), False si es de
+    las de dos argumentos ordena(jugadas, jugador)
+    
+    """
+    try:
+        return len(signature(ordena).parameters) >= 5
+    except (TypeError, ValueError):
+        return False
+
+
+class Estadisticas:
+    """
+    Contadores de lo que hizo una búsqueda con negamax
+    
+    nodos: Nodos visitados
+    hojas: Nodos evaluados con evalua al llegar a la profundidad límite
+    terminales: Nodos terminales
+    tt_sondeos: Búsquedas en la tabla de transposición
+    tt_aciertos: Sondeos con una entrada de profundidad suficiente
+    tt_cortes: Nodos resueltos solo con la tabla de transposición
+    cortes: Cortes beta
+    cortes_primera: Cortes beta con la primera jugada revisada
+    d, tiempo: Profundidad y segundos de la iteración (minimax_iterativo)
+    
+    """
+    def __init__(self, d=None):
+        self.nodos = self.hojas = self.terminales = 0
+        self.tt_sondeos = self.tt_aciertos = self.tt_cortes = 0
+        self.cortes = self.cortes_primera = 0
+        self.d, self.tiempo = d, 0.0
+    
+    @property
+    def tasa_primera(self):
+        """Fracción de los cortes beta que hizo la primera jugada"""
+        return self.cortes_primera / self.cortes if self.cortes else 0.0
+    
+    @property
+    def ramificacion(self):
+        """Factor de ramificación efectivo, nodos ** (1 / d)"""
+        return self.nodos ** (1 / self.d) if self.d else None
+    
+    def __repr__(self):
+        return (
+            f"d={self.d} nodos={self.nodos} hojas={self.hojas} "
+            f"terminales={self.terminales} tt={self.tt_aciertos}/"
+            f"{self.tt_sondeos} (cortes {self.tt_cortes}) cortes={self.cortes} "
+            f"primera={self.tasa_primera:.2f} tiempo={self.tiempo:.3f}s"
+        )
+
+
+class ContextoBusqueda:
+    """
+    Lo que se va aprendiendo durante una búsqueda y que puede usar
+    la función de ordenamiento:
+    
+    ply (int): Distancia a la raíz del nodo que se está ordenando
+    killers (dict): Por ply, las dos últimas jugadas que causaron un corte
+    historia (dict): Por (jugador, jugada), qué tanto ha causado cortes
+    stats (Estadisticas): Contadores de la búsqueda, o None
+    simetria (bool): Si la tabla de transposición usa la llave canónica
+        (juego.canonica) en lugar de juego.clave
+    mutable (bool): Si las jugadas se hacen y deshacen en un tablero
+        mutable (juego.haz_jugada) en lugar de usar juego.transicion
+    horizonte (bool): Si algún valor de la búsqueda viene de evalua (o de
+        una entrada de la tabla que a su vez venía de evalua), es decir, 
+        si la profundidad cortó alguna rama antes del final
+    
+    """
+    def __init__(self, ordena=None):
+        self.ply = 0
+        self.killers = {}
+        self.historia = {}
+        self.stats = None
+        self.simetria = False
+        self.mutable = False
+        self.horizonte = False
+        self.con_contexto = ordena != None and acepta_contexto(ordena)
+    
+    def registra_corte(self, jugada, jugador, d):
+        killers = self.killers.setdefault(self.ply, [])
+        if jugada not in killers:
+            killers.insert(0, jugada)
+            del killers[2:]
+        llave = (jugador, jugada)
+        self.historia[llave] = self.historia.get(llave, 0) + (d * d if d else 1)
+
+
+class OrdenaHistoria:
+    """
+    Función de ordenamiento con contexto que pone primero las jugadas
+    killer del ply y luego ordena por la heurística de historia.
+    
+    base es un ordenamiento previo (de cualquiera de las dos interfaces)
+    que se respeta entre jugadas con la misma historia
+    
+    """
+    def __init__(self, base=None):
+        self.base = base
+        self.base_con_contexto = base != None and acepta_contexto(base)
+    
+    def __call__(self, jugadas, jugador, estado, d, contexto):
+        if self.base_con_contexto:
+            jugadas = self.base(jugadas, jugador, estado, d, contexto)
+        elif self.base != None:
+            jugadas = self.base(jugadas, jugador)
+        historia = contexto.historia
+        jugadas = sorted(jugadas, key=lambda a: -historia.get((jugador, a), 0))
+        killers = [a for a in contexto.killers.get(contexto.ply, []) if a in jugadas]
+        return killers + [a for a in jugadas if a not in killers]
+
+
 def negamax(
     juego, estado, jugador,
     alpha=-1e10, beta=1e10, ordena=None, 
     d=None, evalua=None,
-    transp={}, traza=[]
+    transp=None, traza=None, reloj=None, pvs=False, contexto=None,
+    stats=None, simetria=False, mutable=True
     ):
     """
     Devuelve la mejor jugada para el jugador en el estado
@@ -27,69 +210,189 @@ def negamax(
     jugador (-1, 1): Jugador que realiza la jugada
     alpha (float): Limite inferior
     beta (float): Limite superior
-    ordena (function:) Funcion de ordenamiento
+    ordena (function:) Funcion de ordenamiento, ya sea
+        ordena(jugadas, jugador) u ordena(jugadas, jugador, estado, d, contexto)
         si None, ordena aleatoriamente
     d (int): Profundidad. 
         Si None, busca hasta el final
     evalua: function de evaluación
         Siempre evalua para el jugador 1
-    transp (dict): Tabla de transposición
+    transp (dict): Tabla de transposición, indexada por juego.clave(estado)
+        con entradas (valor, profundidad, tipo de cota, mejor jugada, edad).
+        Si None, se usa una tabla nueva sólo para esta búsqueda
     traza (list): Trazabilidad
+    reloj (Reloj): Si no es None, la búsqueda se aborta con TiempoAgotado
+        cuando se acaba el tiempo
+    pvs (bool): Si True, busqueda de variante principal: solo la primera
+        jugada se busca con la ventana completa, y las demas con ventana
+        nula, volviendo a buscar solo si resultan mejores
+    contexto (ContextoBusqueda): Killers e historia de la búsqueda. 
+        Si None, se crea uno nuevo para esta búsqueda
+    stats (Estadisticas): Si no es None, se van sumando ahí los contadores
+        de la búsqueda
+    simetria (bool): Si True, la tabla de transposición se indexa con 
+        juego.canonica(estado), así que las posiciones simétricas comparten
+        entrada (la mejor jugada se guarda en las coordenadas de la forma 
+        canónica). Solo es correcto si evalua también es simétrica
+    mutable (bool): Si True y el juego tiene tablero mutable 
+        (juego.tablero(estado) no es None), las jugadas se hacen y deshacen
+        en su lugar con juego.haz_jugada y juego.deshaz_jugada, sin crear 
+        un estado nuevo por nodo. Si no, se usa juego.transicion
     
     Regresa
     -------
     tuple: (lista mejores jugadas, valor)
     
     """
-    if d != None and evalua == None:
-        raise ValueError("Se necesita evalua si d no es None")
-    if type(ordena) != type(None) and type(ordena) != type(lambda x: x):
-        raise ValueError("ordena debe ser una función")
-    if type(evalua) != type(None) and type(evalua) != type(lambda x: x):
-        raise ValueError("evalua debe ser una función")
-    if type(transp) != dict:
-        raise ValueError("transp debe ser un diccionario")
-    if type(traza) != list: 
-        raise ValueError("traza debe ser una lista")
+    if contexto == None or contexto.ply == 0:
+        if d != None and evalua == None:
+            raise ValueError("Se necesita evalua si d no es None")
+        if ordena != None and not callable(ordena):
+            raise ValueError("ordena debe ser una función")
+        if type(evalua) != type(None) and type(evalua) != type(lambda x: x):
+            raise ValueError("evalua debe ser una función")
+        if transp == None:
+            transp = {}
+        if traza == None:
+            traza = []
+        if contexto == None:
+            contexto = ContextoBusqueda(ordena)
+        if stats != None:
+            contexto.stats = stats
+        if simetria:
+            contexto.simetria = True
+        tablero = juego.tablero(estado) if mutable else None
+        contexto.mutable = tablero != None
+        if contexto.mutable:
+            estado = tablero
+        if not isinstance(transp, dict):
+            raise ValueError("transp debe ser un diccionario")
+        if type(traza) != list: 
+            raise ValueError("traza debe ser una lista")
 
+    if reloj != None:
+        reloj.revisa()
+    stats = contexto.stats
+    if stats != None:
+        stats.nodos += 1
     if juego.terminal(estado):
+        if stats != None:
+            stats.terminales += 1
         return [], jugador * juego.ganancia(estado)
     if d == 0:
+        if stats != None:
+            stats.hojas += 1
+        contexto.horizonte = True
         return [], jugador * evalua(estado)
-    if d != None and estado in transp and transp[estado][1] >= d:
-        return [], transp[estado][0]
     
-    v = -1e10
+    # La búsqueda completa (d None) vale para cualquier profundidad
+    prof = float('inf') if d == None else d
+    alpha0, a_tt, acotada = alpha, None, False
+    if contexto.simetria:
+        clave, g = juego.canonica(estado)
+    else:
+        clave, g = juego.clave(estado), None
+    if stats != None:
+        stats.tt_sondeos += 1
+    if clave in transp:
+        v_tt, d_tt, cota, a_tt, _ = transp[clave]
+        if g != None and a_tt != None:
+            a_tt = juego.jugada_de_canonica(a_tt, g)
+        if d_tt >= prof:
+            # Solo las entradas de búsquedas hasta el final no dependen de evalua
+            acotada = d_tt != float('inf')
+            if stats != None:
+                stats.tt_aciertos += 1
+            if cota == INFERIOR and v_tt > alpha:
+                alpha = v_tt
+            elif cota == SUPERIOR and v_tt < beta:
+                beta = v_tt
+            if cota == EXACTO or alpha >= beta:
+                if stats != None:
+                    stats.tt_cortes += 1
+                if acotada:
+                    contexto.horizonte = True
+                return [a_tt], v_tt
+    
+    v, mejor, mejores = -1e10, None, []
     jugadas = list(juego.jugadas_legales(estado, jugador))
-    if ordena != None:
+    if contexto.con_contexto:
+        jugadas = ordena(jugadas, jugador, estado, d, contexto)
+    elif ordena != None:
         jugadas = ordena(jugadas, jugador)
     else:
         shuffle(jugadas)
-    if traza:
-        a_pref = traza.pop(0)
-        if a_pref in jugadas:
-            jugadas = [a_pref] + [a for a in jugadas if a != a_pref]
-    for a in jugadas:
-        traza_actual, v2 = negamax(
-            juego, juego.transicion(estado, a, jugador), -jugador, 
-            -beta, -alpha, ordena, d if d == None else d - 1, 
-            evalua, transp, traza
-        )
-        v2 = -v2
-        if v2 > v:
-            v = v2
-            mejor = a
-            mejores = traza_actual[:]
-        if v >= beta:
-            break
-        if v > alpha:
-            alpha = v
-    transp[estado] = (v, d)
+    a_pref = traza.pop(0) if traza else a_tt
+    if a_pref != None and a_pref in jugadas:
+        jugadas = [a_pref] + [a for a in jugadas if a != a_pref]
+    # El horizonte se lleva por separado para este subárbol
+    horizonte, contexto.horizonte = contexto.horizonte, acotada
+    contexto.ply += 1
+    try:
+        d2 = d if d == None else d - 1
+        for a in jugadas:
+            if contexto.mutable:
+                juego.haz_jugada(estado, a, jugador)
+                hijo = estado
+            else:
+                hijo = juego.transicion(estado, a, jugador)
+            if pvs and mejor != None:
+                traza_actual, v2 = negamax(
+                    juego, hijo, -jugador, -alpha - VENTANA_NULA, -alpha, 
+                    ordena, d2, evalua, transp, traza, reloj, pvs, contexto
+                )
+                if alpha < -v2 < beta:
+                    traza_actual, v2 = negamax(
+                        juego, hijo, -jugador, -beta, -alpha, 
+                        ordena, d2, evalua, transp, traza, reloj, pvs, contexto
+                    )
+            else:
+                traza_actual, v2 = negamax(
+                    juego, hijo, -jugador, -beta, -alpha, 
+                    ordena, d2, evalua, transp, traza, reloj, pvs, contexto
+                )
+            # Si se acaba el tiempo el tablero se queda a medias, pero 
+            # solo vive durante esta búsqueda
+            if contexto.mutable:
+                juego.deshaz_jugada(estado, a, jugador)
+            v2 = -v2
+            if v2 > v:
+                v = v2
+                mejor = a
+                mejores = traza_actual[:]
+            if v >= beta:
+                contexto.registra_corte(a, jugador, d)
+                if stats != None:
+                    stats.cortes += 1
+                    if a == jugadas[0]:
+                        stats.cortes_primera += 1
+                break
+            if v > alpha:
+                alpha = v
+    except TiempoAgotado as e:
+        # Cada nivel sobreescribe el parcial, así que al final queda el de la raíz
+        e.parcial = None if mejor == None else ([mejor] + mejores, v)
+        contexto.ply -= 1
+        raise
+    contexto.ply -= 1
+    if not contexto.horizonte:
+        # Todo el subárbol llegó al final: el valor vale a cualquier profundidad
+        prof = float('inf')
+    contexto.horizonte = contexto.horizonte or horizonte
+    edad = getattr(transp, 'edad', 0)
+    a_tt = mejor if g == None else juego.jugada_canonica(mejor, g)
+    if v <= alpha0:
+        transp[clave] = (v, prof, SUPERIOR, a_tt, edad)
+    elif v >= beta:
+        transp[clave] = (v, prof, INFERIOR, a_tt, edad)
+    else:
+        transp[clave] = (v, prof, EXACTO, a_tt, edad)
     return [mejor] + mejores, v 
 
 
 def jugador_negamax(
-    juego, estado, jugador, ordena=None, d=None, evalua=None
+    juego, estado, jugador, ordena=None, d=None, evalua=None, transp=None,
+    pvs=False, simetria=False, mutable=True
     ):
     """
     Funcion burrito para el negamax
@@ -98,26 +401,493 @@ def jugador_negamax(
     traza, _ = negamax(
         juego=juego, estado=estado, jugador=jugador, 
         alpha=-1e10, beta=1e10, ordena=ordena, d=d, 
-        evalua=evalua, transp={}, traza=[])
+        evalua=evalua, transp=transp, traza=[], pvs=pvs, simetria=simetria,
+        mutable=mutable)
     return traza[0]
 
 
+def mtdf(
+    juego, estado, jugador, f=0, ordena=None, d=None, evalua=None, 
+    transp=None, reloj=None, contexto=None, stats=None, simetria=False,
+    mutable=True
+    ):
+    """
+    MTD(f): encuentra el valor minimax con búsquedas de ventana nula
+    alrededor de f, cada una acotando el valor por arriba o por abajo,
+    hasta que las dos cotas coinciden
+    
+    La tabla de transposición guarda las cotas de cada búsqueda, así que 
+    las siguientes repiten poco trabajo. Entre más cerca esté f del valor 
+    (por ejemplo, el valor de la profundidad anterior), menos búsquedas 
+    hacen falta. Los parámetros y lo que regresa son los de negamax.
+    
+    """
+    if transp == None:
+        transp = {}
+    if contexto == None:
+        contexto = ContextoBusqueda(ordena)
+    if simetria:
+        contexto.simetria = True
+    inferior, superior = -1e10, 1e10
+    g, traza = f, []
+    while inferior < superior:
+        beta = g + VENTANA_NULA if g == inferior else g
+        # La traza solo sirve de una búsqueda que falla alto
+        traza_g, g = negamax(
+            juego, estado, jugador, beta - VENTANA_NULA, beta, ordena, d,
+            evalua, transp, traza[:], reloj, False, contexto, stats,
+            mutable=mutable
+        )
+        if g < beta:
+            superior = g
+        else:
+            inferior, traza = g, traza_g
+    return traza, g
+
+
 def minimax_iterativo(
     juego, estado, jugador, tiempo=10,
-    ordena=None, d=None, evalua=None,
+    ordena=None, d=None, evalua=None, transp=None,
+    pvs=False, aspiracion=None, reporta=None, estrategia='alfabeta',
+    simetria=False, mutable=True
     ):  
     """
     Devuelve la mejor jugada para el jugador en el estado
     acotando a un periodo de tiempo
     
+    El tiempo es un límite duro: la iteración en curso se aborta al
+    acabarse y se usa la jugada de la última profundidad completa, o 
+    la de la iteración abortada si ya había revisado la jugada principal.
+    Si d no es None, no se busca más allá de esa profundidad.
+    
+    Todas las iteraciones comparten la tabla de transposición y el 
+    contexto (killers e historia), así que cada profundidad aprovecha 
+    lo que encontraron las anteriores
+    
+    Si aspiracion no es None, cada iteración empieza con la ventana
+    (v - aspiracion, v + aspiracion) alrededor del valor v de la 
+    anterior, y solo si el valor cae fuera se abre ese lado de la ventana.
+    pvs se pasa tal cual a negamax.
+    
+    Si reporta no es None, al terminar cada profundidad se llama
+    reporta(d, traza, v, stats) con las Estadisticas de esa iteración.
+    
+    Con estrategia='mtdf' cada profundidad se busca con mtdf empezando
+    por el valor de la anterior (en este caso no se usan ni pvs ni 
+    aspiracion, y al acabarse el tiempo se usa la profundidad anterior).
+    
+    simetria y mutable se pasan tal cual a negamax.
+    
+    Si una iteración no cortó ninguna rama por profundidad, ya tiene el 
+    valor exacto y no se sigue profundizando.
+    
     """
-    t0 = time()
-    d, traza = 2, []
-    while time() - t0 < tiempo/2:
-        traza, v = negamax(
-            juego=juego, estado=estado, jugador=jugador,  
-            alpha=-1e10, beta=1e10, ordena=ordena, d=d, evalua=evalua, 
-            transp={}, traza=traza
-        )
+    if estrategia not in ('alfabeta', 'mtdf'):
+        raise ValueError("estrategia debe ser 'alfabeta' o 'mtdf'")
+    if transp == None:
+        transp = {}
+    contexto = ContextoBusqueda(ordena)
+    contexto.simetria = simetria
+    reloj = Reloj(tiempo)
+    # Se empieza en 2 (en 1 no hay nada que ordenar), salvo que el tope sea 1
+    d_max, d, traza, v = d, 2 if d == None else min(2, d), [], None
+    while d_max == None or d <= d_max:
+        alpha, beta = -1e10, 1e10
+        if aspiracion != None and v != None:
+            alpha, beta = v - aspiracion, v + aspiracion
+        stats = Estadisticas(d) if reporta != None else None
+        contexto.stats = stats
+        t_d = time()
+        contexto.horizonte = False
+        try:
+            if estrategia == 'mtdf':
+                traza_d, v_d = mtdf(
+                    juego, estado, jugador, 0 if v == None else v, ordena, d,
+                    evalua, transp, reloj, contexto, stats, mutable=mutable
+                )
+            while estrategia == 'alfabeta':
+                # negamax consume la traza que recibe, por eso va una copia
+                traza_d, v_d = negamax(
+                    juego=juego, estado=estado, jugador=jugador,  
+                    alpha=alpha, beta=beta, ordena=ordena, d=d, evalua=evalua, 
+                    transp=transp, traza=traza[:], reloj=reloj, pvs=pvs,
+                    contexto=contexto, stats=stats, mutable=mutable
+                )
+                if v_d <= alpha:
+                    alpha = -1e10
+                elif v_d >= beta:
+                    beta = 1e10
+                else:
+                    break
+        except TiempoAgotado as e:
+            # La primera jugada revisada en la raíz es la de la traza, así 
+            # que si ya terminó alguna y mejoró a alpha, el parcial es al 
+            # menos tan bueno (con mtdf las ventanas son nulas y no sirve)
+            if (estrategia == 'alfabeta' and e.parcial != None 
+                    and e.parcial[1] > alpha):
+                traza = e.parcial[0]
+            break
+        traza, v = traza_d, v_d
+        if reporta != None:
+            stats.tiempo = time() - t_d
+            reporta(d, traza, v, stats)
+        if not contexto.horizonte:
+            # Esta profundidad ya llegó al final de todas las ramas
+            break
         d += 1
+    if not traza:
+        return list(juego.jugadas_legales(estado, jugador))[0]
+    return traza[0]
+
+
+class JugadorNegamax:
+    """
+    Jugador con negamax que conserva su tabla de transposición
+    durante todo el juego, para aprovechar lo buscado en jugadas
+    anteriores
+    
+    Se usa como cualquier otro jugador: jugador(juego, estado, j).
+    Si tiempo no es None juega con minimax_iterativo (con la estrategia
+    'alfabeta' o 'mtdf') sin pasar de la profundidad d, si no con 
+    jugador_negamax a profundidad d.
+    
+    Si libro no es None, es una función libro(juego, estado, j) que 
+    devuelve la jugada de un libro de aperturas o None si la posición 
+    no está en el libro, y se consulta antes de buscar. De la misma 
+    forma, final(juego, estado, j) devuelve la jugada exacta de un 
+    solucionador de finales o None si todavía no es el final.
+    
+    """
+    def __init__(
+        self, ordena=None, d=None, evalua=None, tiempo=None, 
+        capacidad=1000000, pvs=False, aspiracion=None, libro=None,
+        final=None, estrategia='alfabeta', simetria=False, mutable=True
+        ):
+        self.ordena, self.d, self.evalua = ordena, d, evalua
+        self.tiempo, self.estrategia = tiempo, estrategia
+        self.pvs, self.aspiracion = pvs, aspiracion
+        self.libro, self.final = libro, final
+        self.simetria, self.mutable = simetria, mutable
+        self.transp = TablaTransposicion(capacidad)
+    
+    def __call__(self, juego, estado, jugador):
+        for oraculo in (self.libro, self.final):
+            if oraculo != None:
+                jugada = oraculo(juego, estado, jugador)
+                if jugada != None:
+                    return jugada
+        self.transp.envejece()
+        if self.tiempo != None:
+            return minimax_iterativo(
+                juego, estado, jugador, tiempo=self.tiempo, d=self.d,
+                ordena=self.ordena, evalua=self.evalua, transp=self.transp,
+                pvs=self.pvs, aspiracion=self.aspiracion,
+                estrategia=self.estrategia, simetria=self.simetria,
+                mutable=self.mutable
+            )
+        return jugador_negamax(
+            juego, estado, jugador, ordena=self.ordena, d=self.d,
+            evalua=self.evalua, transp=self.transp, pvs=self.pvs,
+            simetria=self.simetria, mutable=self.mutable
+        )
+
+
+# Búsqueda en paralelo
+#
+# Las dos primeras capas del árbol se reparten entre los procesos: cada
+# tarea busca un nieto de la raíz, el que resulta de la jugada a de la raíz
+# y la respuesta b del rival. Como el rival escoge, el valor de a es el
+# menor de los de sus nietos, y solo importa si no es peor que el alpha de
+# la raíz. El alpha y, para cada jugada de la raíz, el menor valor de los
+# nietos que ya terminaron (su cota) están en memoria compartida, y las
+# tareas los revisan mientras buscan. Cada trabajador conserva su tabla de
+# transposición entre las tareas de una misma búsqueda.
+
+# Cuántas jugadas de la raíz caben en la memoria compartida
+MAX_JUGADAS_RAIZ = 256
+
+_alpha_compartida = None
+_mejor_compartida = None
+_cotas_compartidas = None
+_transp_trabajador = None
+_busqueda_trabajador = None
+
+
+def _inicia_trabajador(alpha, mejor, cotas):
+    global _alpha_compartida, _mejor_compartida, _cotas_compartidas
+    _alpha_compartida, _mejor_compartida = alpha, mejor
+    _cotas_compartidas = cotas
+
+
+def _alpha_tarea(i):
+    # Si la jugada i va antes que la mejor hasta ahora, se abre un poco la
+    # ventana para que un empate regrese su valor exacto y así desempatar
+    # igual que negamax. El proceso principal cambia la mejor antes que
+    # alpha, así que se leen en el orden contrario
+    alpha = _alpha_compartida.value
+    return alpha - VENTANA_NULA if i < _mejor_compartida.value else alpha
+
+
+class _VentanaCambiada(Exception):
+    """
+    Se lanza desde negamax en una tarea cuando cambió el alpha de la raíz
+    o la cota de su jugada, para volver a buscar con la ventana nueva
+    
+    """
+
+
+class _Vigia:
+    """
+    Hace las veces de Reloj en negamax para que la búsqueda de un nieto
+    revise cada cierto número de nodos si cambió su ventana: la vuelve a
+    empezar con la ventana más angosta (lo ya buscado queda en la tabla de
+    transposición) o, si la jugada de la raíz ya no puede ser la mejor, 
+    la abandona
+    
+    """
+    def __init__(self, i, alpha, beta, cada=64):
+        self.i, self.alpha, self.beta = i, alpha, beta
+        self.cada = self.cuenta = cada
+    
+    def revisa(self):
+        self.cuenta -= 1
+        if self.cuenta == 0:
+            self.cuenta = self.cada
+            if (_alpha_tarea(self.i) > self.alpha 
+                    or _cotas_compartidas[self.i] < self.beta):
+                raise _VentanaCambiada()
+
+
+def _busca_nieto(
+    busqueda, juego, estado, jugador, i, a, b, ordena, d, evalua, pvs
+    ):
+    """
+    Busca, en un proceso trabajador, el nieto de la raíz al que se llega
+    con la i-ésima jugada a de la raíz y la respuesta b. Regresa 
+    (i, b, traza, u) con u el valor para el jugador de la raíz, o con traza
+    y u en None si la jugada a ya no puede ser la mejor
+    
+    """
+    global _transp_trabajador, _busqueda_trabajador
+    # Con una tabla de una búsqueda anterior, que llegó más profundo, los
+    # valores ya no serían los de negamax a profundidad d
+    if busqueda != _busqueda_trabajador:
+        _transp_trabajador, _busqueda_trabajador = {}, busqueda
+    nieto = juego.transicion(juego.transicion(estado, a, jugador), b, -jugador)
+    while True:
+        alpha, beta = _alpha_tarea(i), _cotas_compartidas[i]
+        if beta <= alpha:
+            return i, b, None, None
+        try:
+            traza, u = negamax(
+                juego, nieto, jugador, alpha, beta, ordena, d, evalua,
+                _transp_trabajador, [], _Vigia(i, alpha, beta), pvs
+            )
+        except _VentanaCambiada:
+            continue
+        return i, b, traza, u
+
+
+class BusquedaParalela:
+    """
+    Procesos trabajadores para negamax_paralelo, que se pueden usar en
+    varias búsquedas (por ejemplo en todas las jugadas de un juego) en 
+    lugar de crearlos cada vez. Se cierra con cierra() o usándola en un
+    with.
+    
+    trabajadores (int): Número de procesos, si None uno por núcleo
+    
+    """
+    def __init__(self, trabajadores=None):
+        self.alpha = Value('d', -1e10)
+        self.mejor = Value('i', MAX_JUGADAS_RAIZ)
+        self.cotas = Array('d', MAX_JUGADAS_RAIZ)
+        self.busquedas = 0
+        self.ejecutor = ProcessPoolExecutor(
+            trabajadores, initializer=_inicia_trabajador,
+            initargs=(self.alpha, self.mejor, self.cotas)
+        )
+    
+    def cierra(self):
+        self.ejecutor.shutdown(cancel_futures=True)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *args):
+        self.cierra()
+
+
+def _ordena_jugadas(juego, estado, jugador, d, ordena, contexto):
+    # Las jugadas de estado en el orden en que las revisaría negamax
+    jugadas = list(juego.jugadas_legales(estado, jugador))
+    if contexto.con_contexto:
+        return ordena(jugadas, jugador, estado, d, contexto)
+    if ordena != None:
+        return ordena(jugadas, jugador)
+    shuffle(jugadas)
+    return jugadas
+
+
+def negamax_paralelo(
+    juego, estado, jugador, ordena=None, d=None, evalua=None, pvs=False,
+    trabajadores=None, paralela=None
+    ):
+    """
+    Negamax que reparte los nietos de la raíz entre varios procesos
+    
+    Las jugadas se revisan como en Young Brothers Wait en las dos primeras
+    capas: de la primera jugada de la raíz se busca primero su primera 
+    respuesta, luego las demás respuestas en paralelo, y con eso ya se 
+    tiene un alpha. Después se busca en paralelo la primera respuesta a
+    cada una de las demás jugadas, que muchas veces basta para descartarla,
+    y solo de las que no se descartan se buscan las demás respuestas.
+    
+    Las tareas que ya están buscando ven los cambios del alpha de la raíz
+    y de la cota de su jugada (ver _Vigia), así que se descartan o
+    angostan su ventana sin esperar a terminar.
+    
+    La aceleración no es lineal: cada proceso tiene su propia tabla de 
+    transposición y parte de las tareas especulativas se descartan tarde,
+    así que se revisan más nodos que con negamax. Sumando todos los 
+    procesos, en las posiciones del benchmark con 1 y 8 trabajadores se 
+    revisan 1.15 y 2.23 veces los nodos de negamax en conecta 4 (d=8), y 
+    1.03 y 1.40 veces en el super gato (d=7), así que con 8 núcleos la 
+    aceleración es a lo más de unas 3.6 y 5.7 veces respectivamente.
+    
+    juego, ordena y evalua deben poder serializarse con pickle (funciones
+    definidas a nivel de módulo, no lambdas). Si ordena no es None, el
+    valor y la jugada son los mismos que los de negamax.
+    
+    trabajadores (int): Número de procesos, si None uno por núcleo
+    paralela (BusquedaParalela): Procesos ya creados a usar; si None se 
+        crean solo para esta búsqueda con tantos trabajadores
+    
+    """
+    if juego.terminal(estado):
+        return [], jugador * juego.ganancia(estado)
+    if d == 0:
+        return [], jugador * evalua(estado)
+    if paralela == None:
+        with BusquedaParalela(trabajadores) as paralela:
+            return negamax_paralelo(
+                juego, estado, jugador, ordena, d, evalua, pvs, 
+                paralela=paralela
+            )
+    
+    contexto = ContextoBusqueda(ordena)
+    jugadas = _ordena_jugadas(juego, estado, jugador, d, ordena, contexto)
+    if len(jugadas) > MAX_JUGADAS_RAIZ:
+        raise ValueError("Demasiadas jugadas en la raíz")
+    d1 = d if d == None else d - 1
+    d2 = d if d == None else d - 2
+    
+    # Valor exacto (para el jugador de la raíz) y traza de cada jugada de
+    # la raíz ya resuelta, y respuestas del rival de las que hay que repartir
+    valores, trazas, respuestas = {}, {}, {}
+    contexto.ply = 1
+    for i, a in enumerate(jugadas):
+        hijo = juego.transicion(estado, a, jugador)
+        if d1 == 0 or juego.terminal(hijo):
+            traza, v = negamax(juego, hijo, -jugador, d=d1, evalua=evalua)
+            valores[i], trazas[i] = -v, [a] + traza
+        else:
+            respuestas[i] = _ordena_jugadas(
+                juego, hijo, -jugador, d1, ordena, contexto
+            )
+    
+    # alpha es el valor de la mejor jugada resuelta hasta ahora, y mejor
+    # su número. Si hay empate gana la que va antes, como en negamax
+    alpha, mejor = -1e10, MAX_JUGADAS_RAIZ
+    for i in sorted(valores):
+        if valores[i] > alpha:
+            alpha, mejor = valores[i], i
+    paralela.busquedas += 1
+    paralela.mejor.value, paralela.alpha.value = mejor, alpha
+    for i in respuestas:
+        paralela.cotas[i] = 1e10
+    resultados = {i: {} for i in respuestas}
+    tareas = {}
+    
+    def descartada(i):
+        # La jugada i ya no puede ser la mejor
+        cota = paralela.cotas[i]
+        return cota < alpha or cota == alpha and i > mejor
+    
+    def reparte(i, bs):
+        for b in bs:
+            futuro = paralela.ejecutor.submit(
+                _busca_nieto, paralela.busquedas, juego, estado, 
+                jugador, i, jugadas[i], b, ordena, d2, evalua, pvs
+            )
+            tareas[futuro] = i
+    
+    # Primero la primera respuesta a la primera jugada que se reparte, y 
+    # las demás jugadas esperan a que esa quede resuelta
+    pendientes = sorted(respuestas)
+    if pendientes:
+        primera = pendientes.pop(0)
+        reparte(primera, respuestas[primera][:1])
+    while tareas:
+        terminados, _ = wait(tareas, return_when=FIRST_COMPLETED)
+        for futuro in terminados:
+            i = tareas.pop(futuro)
+            if futuro.cancelled():
+                continue
+            _, b, traza, u = futuro.result()
+            if u != None:
+                resultados[i][b] = traza, u
+                if u < paralela.cotas[i]:
+                    paralela.cotas[i] = u
+                if len(resultados[i]) == 1 and not descartada(i):
+                    # La primera respuesta no descartó la jugada
+                    reparte(i, respuestas[i][1:])
+                terminada = len(resultados[i]) == len(respuestas[i])
+                if terminada and not descartada(i):
+                    # Primero mejor y luego alpha (ver _alpha_tarea)
+                    alpha, mejor = paralela.cotas[i], i
+                    paralela.mejor.value, paralela.alpha.value = mejor, alpha
+                    valores[i] = alpha
+            if pendientes and (i == primera and not tareas 
+                    or descartada(primera)):
+                # Ya hay alpha, ahora la primera respuesta a las demás
+                for j in pendientes:
+                    reparte(j, respuestas[j][:1])
+                pendientes = []
+        # Las tareas en espera de jugadas ya descartadas no hacen falta
+        for futuro, i in tareas.items():
+            if descartada(i):
+                futuro.cancel()
+    
+    # La traza sigue por la primera respuesta con el valor de la jugada
+    v = valores[mejor]
+    if mejor not in trazas:
+        for b in respuestas[mejor]:
+            traza, u = resultados[mejor].get(b, (None, None))
+            if u == v:
+                trazas[mejor] = [jugadas[mejor], b] + traza
+                break
+    return trazas[mejor], v
+
+
+# Los procesos de jugador_negamax_paralelo, por número de trabajadores
+_PARALELAS = {}
+
+
+def jugador_negamax_paralelo(
+    juego, estado, jugador, ordena=None, d=None, evalua=None, pvs=False,
+    trabajadores=None
+    ):
+    """
+    Funcion burrito para el negamax_paralelo. Los procesos se crean en la
+    primera llamada y se usan en las siguientes jugadas
+    
+    """
+    paralela = _PARALELAS.get(trabajadores)
+    if paralela == None:
+        paralela = _PARALELAS[trabajadores] = BusquedaParalela(trabajadores)
+    traza, _ = negamax_paralelo(
+        juego, estado, jugador, ordena=ordena, d=d, evalua=evalua, 
+        pvs=pvs, paralela=paralela
+    )
     return traza[0]
@@ -0,0 +1,128 @@
+"""
+Solución exhaustiva de juegos pequeños
+
+Para los juegos cuyo espacio de estados alcanzables cabe en memoria (como
+el gato), se puede calcular una sola vez el valor exacto y la mejor jugada
+de cada estado, guardarlo en disco y después jugar consultando la tabla,
+sin buscar nada.
+
+El valor es la ganancia para el jugador que mueve con juego perfecto
+(1, 0 o -1), y entre las jugadas con el mismo valor se prefiere ganar en
+el menor número de jugadas y perder en el mayor.
+
+    jugador = JugadorTabla(Gato(), 'gato_solucion.pkl')
+    jugada = jugador(juego, s, j)
+
+La tabla se carga (o se construye y se guarda si no existe el archivo) la
+primera vez que se usa el jugador.
+
+"""
+
+import os
+import pickle
+from time import perf_counter
+
+
+def resuelve(juego, estado=None, jugador=None):
+    """
+    Resuelve el juego desde el estado (por omisión el inicial) visitando
+    una sola vez cada estado alcanzable
+
+    Devuelve (tabla, n) donde tabla[(s, j)] = (valor, jugada) para los
+    estados no terminales y n es el número de estados alcanzables
+
+    """
+    if estado == None:
+        estado, jugador = juego.inicializa()
+    tabla, memo = {}, {}
+
+    def valor(s, j):
+        # Devuelve (valor para j, jugadas hasta el final)
+        llave = (tuple(s), j)
+        if llave in memo:
+            return memo[llave]
+        if juego.terminal(s):
+            memo[llave] = (j * juego.ganancia(s), 0)
+            return memo[llave]
+        mejor, mejor_a = None, None
+        for a in juego.jugadas_legales(s, j):
+            v, n = valor(juego.transicion(s, a, j), -j)
+            candidato = (-v, n + 1)
+            if mejor == None or _preferible(candidato, mejor):
+                mejor, mejor_a = candidato, a
+        memo[llave], tabla[llave] = mejor, (mejor[0], mejor_a)
+        return mejor
+
+    valor(estado, jugador)
+    return tabla, len(memo)
+
+
+def _preferible(x, y):
+    # Ganar pronto, perder tarde
+    return (x[0], -x[1] if x[0] > 0 else x[1]) > (y[0], -y[1] if y[0] > 0 else y[1])
+
+
+def construye(juego, archivo):
+    """
+    Resuelve el juego y guarda la tabla en archivo
+
+    Devuelve el número de estados alcanzables y el tiempo que tomó
+
+    """
+    t0 = perf_counter()
+    tabla, n = resuelve(juego)
+    with open(archivo, 'wb') as f:
+        pickle.dump(tabla, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return n, perf_counter() - t0
+
+
+class JugadorTabla:
+    """
+    Jugador que consulta la tabla de solución del juego
+
+    Se usa como cualquier otro jugador: jugador(juego, estado, j). Si
+    archivo es None la tabla se construye en memoria sin guardarse.
+
+    """
+    def __init__(self, juego, archivo=None):
+        self.juego, self.archivo = juego, archivo
+        self.tabla = None
+
+    def carga(self):
+        """
+        Carga la tabla del archivo, o la construye si no existe
+
+        """
+        if self.tabla == None:
+            if self.archivo == None:
+                self.tabla, _ = resuelve(self.juego)
+            else:
+                if not os.path.exists(self.archivo):
+                    construye(self.juego, self.archivo)
+                with open(self.archivo, 'rb') as f:
+                    self.tabla = pickle.load(f)
+        return self.tabla
+
+    def valor(self, s, j):
+        """
+        Valor exacto del estado s para el jugador j
+
+        """
+        if self.juego.terminal(s):
+            return j * self.juego.ganancia(s)
+        return self.carga()[(tuple(s), j)][0]
+
+    def __call__(self, juego, s, j):
+        return self.carga()[(tuple(s), j)][1]
+
+
+if __name__ == '__main__':
+    import argparse
+    from gato import Gato, ARCHIVO_SOLUCION
+
+    parser = argparse.ArgumentParser(description="Resuelve el juego del gato")
+    parser.add_argument('--archivo', default=ARCHIVO_SOLUCION)
+    args = parser.parse_args()
+
+    n, t = construye(Gato(), args.archivo)
+    print(f"{n} estados alcanzables resueltos en {t:.2f}s, guardados en {args.archivo}")
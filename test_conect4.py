@@ -0,0 +1,92 @@
+"""
+Pruebas de Conecta4Incremental: el puntaje que se lleva jugada por
+jugada tiene que ser siempre el de evalua_nuevo calculado desde cero; y
+de Conecta4Bits, que en cada posición tiene que coincidir con Conecta4
+
+Se corren con: python -m pytest test_conect4.py
+
+"""
+
+from random import Random
+
+import pytest
+
+from conftest import partida
+from juegos_simplificado import Estado
+from minimax import negamax
+from conect4 import Conecta4, Conecta4Incremental, Conecta4Bits
+from conect4 import a_tupla, evalua_nuevo_bits
+from conect4 import evalua_nuevo, evalua_incremental, ordena_centro
+
+
+def posicion_al_azar(rnd, jugadas):
+    """
+    Un tablero simple (sin atributos) después de hasta tantas jugadas al
+    azar, y el jugador al que le toca
+
+    """
+    for n, (s, j, _) in enumerate(partida(Conecta4(), rnd)):
+        if n == jugadas:
+            break
+    return tuple(s), j
+
+
+@pytest.mark.parametrize('inicio', [0, 10, 20])
+def test_puntaje_incremental(inicio):
+    juego, rnd = Conecta4Incremental(), Random(inicio)
+    for _ in range(300):
+        # Se empieza en estados sin puntaje, que se calcula desde cero
+        s, j = posicion_al_azar(rnd, inicio)
+        if juego.terminal(s):
+            continue
+        tablero = juego.tablero(s)
+        historia = []
+        while not juego.terminal(s):
+            esperado = evalua_nuevo(tuple(s))
+            assert evalua_incremental(s) == esperado
+            assert tablero.puntaje == esperado
+            a = rnd.choice(list(juego.jugadas_legales(s, j)))
+            historia.append((a, j, esperado))
+            s = juego.transicion(s, a, j)
+            juego.haz_jugada(tablero, a, j)
+            j = -j
+        esperado = evalua_nuevo(tuple(s))
+        assert s.puntaje == tablero.puntaje == esperado
+        for a, j, esperado in reversed(historia):
+            juego.deshaz_jugada(tablero, a, j)
+            assert tablero.puntaje == esperado
+        assert not tablero.pila
+
+
+@pytest.mark.parametrize('mutable', [False, True])
+def test_negamax_incremental(mutable):
+    rnd = Random(1)
+    for _ in range(8):
+        s, j = posicion_al_azar(rnd, rnd.randrange(4, 16))
+        if Conecta4().terminal(s):
+            continue
+        completo = negamax(
+            Conecta4(), Estado(s), j, ordena=ordena_centro, d=4,
+            evalua=evalua_nuevo, mutable=mutable
+        )
+        incremental = negamax(
+            Conecta4Incremental(), Estado(s), j, ordena=ordena_centro, d=4,
+            evalua=evalua_incremental, mutable=mutable
+        )
+        assert incremental == completo
+
+
+def test_bits_equivalente():
+    bits, juego, rnd = Conecta4Bits(), Conecta4(), Random(2)
+    for _ in range(300):
+        anterior = None
+        for s, j, a in partida(bits, rnd):
+            t = a_tupla(s)
+            if anterior != None:
+                assert t == juego.transicion(*anterior)
+            legales = sorted(juego.jugadas_legales(t, j))
+            assert sorted(bits.jugadas_legales(s, j)) == legales
+            assert bits.terminal(s) == juego.terminal(t)
+            assert bits.ganancia(s) == juego.ganancia(t)
+            assert evalua_nuevo_bits(s) == evalua_nuevo(t)
+            anterior = t, a, j
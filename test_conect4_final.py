@@ -0,0 +1,74 @@
+"""
+Pruebas del solucionador de finales: en posiciones al azar con pocas
+casillas vacías, el puntaje tiene que ser el de una búsqueda exhaustiva
+y la línea que devuelve tiene que ser de juego perfecto
+
+Se corren con: python -m pytest test_conect4_final.py
+
+"""
+
+from random import Random
+
+import pytest
+
+from conftest import copia, partida
+from conect4 import Conecta4, de_tupla
+from conect4_final import resuelve_final, resultado, FinalExacto
+
+
+def exhaustivo(juego, s, j, vistas):
+    """
+    Puntaje exacto de s para j (como en conect4_final) recorriendo todo
+    el árbol, sin podas
+
+    """
+    if (s, j) not in vistas:
+        vacias, v = s.count(0), -1e10
+        for a in juego.jugadas_legales(s, j):
+            s2 = juego.transicion(s, a, j)
+            if juego.ganancia(s2) == j:
+                v = max(v, (vacias + 1) // 2)
+            elif juego.terminal(s2):
+                v = max(v, 0)
+            else:
+                v = max(v, -exhaustivo(juego, copia(s2), -j, vistas))
+        vistas[s, j] = v
+    return vistas[s, j]
+
+
+def posiciones(n, semilla):
+    """
+    n posiciones no terminales al azar con entre 6 y 12 casillas vacías
+
+    """
+    juego, rnd = Conecta4(), Random(semilla)
+    while n:
+        vacias = rnd.randint(6, 12)
+        for s, j, a in partida(juego, rnd):
+            if s.count(0) == vacias:
+                break
+        if a != None:
+            yield copia(s), j
+            n -= 1
+
+
+@pytest.mark.parametrize('semilla', [0, 1])
+def test_final_exhaustivo(semilla):
+    juego, vistas, final = Conecta4(), {}, FinalExacto(12)
+    for s, j in posiciones(20, semilla):
+        puntaje = exhaustivo(juego, s, j, vistas)
+        traza, v = resuelve_final(s, j)
+        assert v == puntaje
+        assert resuelve_final(de_tupla(s), j) == (traza, v)
+        assert final(juego, s, j) == traza[0]
+
+        # Cada jugada de la línea conserva el puntaje exacto
+        for a in traza:
+            assert not juego.terminal(s)
+            assert a in juego.jugadas_legales(s, j)
+            s = copia(juego.transicion(s, a, j))
+            j, puntaje = -j, -puntaje
+            if not juego.terminal(s):
+                assert exhaustivo(juego, s, j, vistas) == puntaje
+        assert juego.terminal(s)
+        assert juego.ganancia(s) == j * resultado(puntaje)
@@ -0,0 +1,28 @@
+"""
+Pruebas del libro de aperturas: la jugada del libro de cada posición
+tiene que ser la de una búsqueda directa a la profundidad del libro,
+también para las posiciones que son reflejo de otras
+
+Se corren con: python -m pytest test_conect4_libro.py
+
+"""
+
+from minimax import negamax
+from conect4 import Conecta4, Conecta4Bits, de_tupla
+from conect4 import ordenar_jugadas_avanzado, evalua_nuevo
+from conect4_libro import LibroAperturas, construye_libro, posiciones
+
+
+def test_libro_busqueda_directa(tmp_path):
+    archivo = str(tmp_path / 'libro.bin')
+    n, _ = construye_libro(archivo, jugadas=2, d=4)
+    libro, juego = LibroAperturas(archivo), Conecta4()
+    assert len(libro) == n == len(posiciones(2))
+    for s, j in posiciones(2).values():
+        traza, _ = negamax(
+            juego, s, j, ordena=ordenar_jugadas_avanzado, d=4,
+            evalua=evalua_nuevo
+        )
+        assert libro(juego, s, j) == traza[0]
+        # El tablero de bits de la misma posición da la misma jugada
+        assert libro(Conecta4Bits(), de_tupla(s), j) == traza[0]
@@ -0,0 +1,356 @@
+"""
+Pruebas de equivalencia de los ganadores y evaluaciones hechos con las
+tablas de lineas.py contra las versiones originales con ciclos, que se
+copian aquí tal como estaban antes del cambio
+
+Se corren con: python -m pytest test_lineas.py
+
+"""
+
+from itertools import product
+from random import Random
+
+from conftest import copia, partida
+import conect4
+import gato
+import utt
+
+
+# Versiones originales
+
+def gato_terminal(s):
+    """
+    Devuelve True si es terminal el estado actual,
+
+    """
+    if 0 not in s:
+        return True
+    if s[0] == s[4] == s[8] != 0:
+        return True
+    if s[2] == s[4] == s[6] != 0:
+        return True
+    for i in range(3):
+        if s[3 * i] == s[3 * i + 1] == s[3 * i + 2] != 0:
+            return True
+        if s[i] == s[i + 3] == s[i + 6] != 0:
+            return True
+    return False
+
+
+def gato_ganancia(s):
+    """
+    Devuelve la ganancia para el jugador 1 en el estado terminal s
+
+    """
+    if s[0] == s[4] == s[8] != 0:
+        return s[0]
+    if s[2] == s[4] == s[6] != 0:
+        return s[2]
+    for i in range(3):
+        if s[3 * i] == s[3 * i + 1] == s[3 * i + 2] != 0:
+            return s[3 * i]
+        if s[i] == s[i + 3] == s[i + 6] != 0:
+            return s[i]
+    return 0
+
+
+def conecta4_ganancia(s):
+    #Verticales
+    for i in range(7):
+        for j in range(3):
+            if (s[i + 7 * j] == s[i + 7 * (j + 1)]
+                == s[i + 7 * (j + 2)] == s[i + 7 * (j + 3)]
+                != 0):
+                return s[i + 7 * j]
+    #Horizontales
+    for i in range(6):
+        for j in range(4):
+            if (s[7 * i + j] == s[7 * i + j + 1]
+                == s[7 * i + j + 2] == s[7 * i + j + 3]
+                != 0):
+                return s[7 * i + j]
+    #Diagonales
+    for i in range(4):
+        for j in range(3):
+            if (s[i + 7 * j] == s[i + 7 * j + 8]
+                == s[i + 7 * j + 16] == s[i + 7 * j + 24]
+                != 0):
+                return s[i + 7 * j]
+            if (s[i + 7 * j + 3] == s[i + 7 * j + 9]
+                == s[i + 7 * j + 15] == s[i + 7 * j + 21]
+                != 0):
+                return s[i + 7 * j + 3]
+    return 0
+
+
+def evalua_3con(s):
+    """
+    Evalua el estado s para el jugador 1
+    """
+    conect3 = sum(
+        1 for i in range(7) for j in range(4)
+        if (s[i + 7 * j] == s[i + 7 * (j + 1)]
+            == s[i + 7 * (j + 2)] == 1)
+    ) - sum(
+        1 for i in range(7) for j in range(4)
+        if (s[i + 7 * j] == s[i + 7 * (j + 1)]
+            == s[i + 7 * (j + 2)] == -1)
+    ) + sum(
+        1 for i in range(6) for j in range(5)
+        if (s[7 * i + j] == s[7 * i + j + 1]
+            == s[7 * i + j + 2] == 1)
+    ) - sum(
+        1 for i in range(6) for j in range(5)
+        if (s[7 * i + j] == s[7 * i + j + 1]
+            == s[7 * i + j + 2] == -1)
+    ) + sum(
+        1 for i in range(5) for j in range(4)
+        if (s[i + 7 * j] == s[i + 7 * j + 8]
+            == s[i + 7 * j + 16] == 1)
+    ) - sum(
+        1 for i in range(5) for j in range(4)
+        if (s[i + 7 * j] == s[i + 7 * j + 8]
+            == s[i + 7 * j + 16] == -1)
+    ) + sum(
+        1 for i in range(5) for j in range(4)
+        if (s[i + 7 * j + 3] == s[i + 7 * j + 9]
+            == s[i + 7 * j + 15] == 1)
+    ) - sum(
+        1 for i in range(5) for j in range(4)
+        if (s[i + 7 * j + 3] == s[i + 7 * j + 9]
+            == s[i + 7 * j + 15] == -1)
+    )
+    promedio = conect3 / (7 * 4 + 6 * 5 + 5 * 4 + 5 * 4)
+    if abs(promedio) >= 1:
+        print("ERROR, evaluación fuera de rango --> ", promedio)
+    return promedio
+
+
+def evalua_nuevo(s):
+    """
+    Evalua el estado s para el jugador 1, considerando secuencias de 3 y 2
+    """
+    puntaje = 0
+
+    # Secuencias de 3, vertical, horizontal y diagonal
+    for i in range(4):
+        for j in range(7):
+            indice = i * 7 + j
+            if s[indice] == s[indice + 7] == s[indice + 14] == 1:
+                puntaje += 5
+            elif s[indice] == s[indice + 7] == s[indice + 14] == -1:
+                puntaje -= 5
+
+    for i in range(6):
+        for j in range(4):
+            indice = i * 7 + j
+            if s[indice] == s[indice + 1] == s[indice + 2] == 1:
+                puntaje += 5
+            elif s[indice] == s[indice + 1] == s[indice + 2] == -1:
+                puntaje -= 5
+
+    for i in range(3, 6):
+        for j in range(4):
+            indice = i * 7 + j
+            if s[indice] == s[indice - 6] == s[indice - 12] == 1:
+                puntaje += 5
+            elif s[indice] == s[indice - 6] == s[indice - 12] == -1:
+                puntaje -= 5
+
+    for i in range(4):
+        for j in range(5):
+            indice = i * 7 + j
+            if s[indice] == s[indice + 8] == s[indice + 16] == 1:
+                puntaje += 5
+            elif s[indice] == s[indice + 8] == s[indice + 16] == -1:
+                puntaje -= 5
+
+    # Secuencias de 2, vertical, horizontal y diagonal
+    for i in range(5):
+        for j in range(7):
+            indice = i * 7 + j
+            if s[indice] == s[indice + 7] == 1:
+                puntaje += 1
+            elif s[indice] == s[indice + 7] == -1:
+                puntaje -= 1
+
+    for i in range(6):
+        for j in range(5):
+            indice = i * 7 + j
+            if s[indice] == s[indice + 1] == 1:
+                puntaje += 1
+            elif s[indice] == s[indice + 1] == -1:
+                puntaje -= 1
+
+    for i in range(4,6):
+        for j in range(5):
+            indice = i * 7 + j
+            if s[indice] == s[indice - 6] == 1:
+                puntaje += 1
+            elif s[indice] == s[indice - 6] == -1:
+                puntaje -= 1
+
+    for i in range(4):
+        for j in range(5):
+            indice = i * 7 + j
+            if s[indice] == s[indice + 8] == 1:
+                puntaje += 1
+            elif s[indice] == s[indice + 8] == -1:
+                puntaje -= 1
+
+    return puntaje
+
+
+def checar_victoria(tablero):
+    """
+    Funcion auxiliar para checar el tablero, regresa el jugador que lo gano o 0 si aun no hay
+
+    """
+    if not isinstance(tablero, (list, tuple)) or len(tablero) != 9:
+        raise ValueError(f"Tablero 3x3, no {tablero}")
+
+    for i in range(3):
+        if tablero[3*i] != 0 and tablero[3*i] == tablero[3*i+1] == tablero[3*i+2]:
+            return tablero[3*i]
+
+    for i in range(3):
+        if tablero[i] != 0 and tablero[i] == tablero[i+3] == tablero[i+6]:
+            return tablero[i]
+
+    if tablero[0] != 0 and tablero[0] == tablero[4] == tablero[8]:
+        return tablero[0]
+    if tablero[2] != 0 and tablero[2] == tablero[4] == tablero[6]:
+        return tablero[2]
+
+    return 0
+
+
+def simple_evalua_uttt(s):
+    """
+    Evalua el estado s para el jugador de forma simple
+    """
+    tableros, j, t = s
+    opt = -j
+    puntaje = 0
+
+    def eval_tab(tablero):
+        val = 0
+        lineas = [
+            [0, 1, 2], [3, 4, 5], [6, 7, 8],  # rows
+            [0, 3, 6], [1, 4, 7], [2, 5, 8],  # columns
+            [0, 4, 8], [2, 4, 6]              # diagonals
+        ]
+        for linea in lineas:
+            # Da valor a tener dos posiciones en un mini tablero
+            valores = [tablero[i] for i in linea]
+            if valores.count(j) == 2 and valores.count(0) == 1:
+                val += 1
+            elif valores.count(opt) == 2 and valores.count(0) == 1:
+                val -= 1
+        return val
+
+    # Resultado del tablero grande checando los tableros mini
+    meta_tab = [checar_victoria(b) for b in tableros]
+
+    for tablero in tableros:
+        result = checar_victoria(tablero)
+        if result == j:
+            puntaje += 5
+        elif result == opt:
+            puntaje -= 5
+        else:
+            puntaje += eval_tab(tablero)
+
+        # Center control - Valor a tener el centro en un minitablero
+        if tablero[4] == j:
+            puntaje += 0.5
+        elif tablero[4] == opt:
+            puntaje -= 0.5
+
+    meta_resultado = checar_victoria(meta_tab)
+    if meta_resultado == j:
+        puntaje += 1000
+    elif meta_resultado == opt:
+        puntaje -= 1000
+
+    # Center meta indice - Valor a tener el centro del meta tablero
+    if meta_tab[4] == j:
+        puntaje += 1
+    elif meta_tab[4] == opt:
+        puntaje -= 1
+    return puntaje
+
+
+
+# Pruebas
+
+LINEAS_GATO = ((0, 1, 2), (3, 4, 5), (6, 7, 8), (0, 3, 6),
+               (1, 4, 7), (2, 5, 8), (0, 4, 8), (2, 4, 6))
+
+
+def partidas(juego, n, semilla):
+    """
+    Todas las posiciones de n partidas al azar
+
+    """
+    rnd = Random(semilla)
+    for _ in range(n):
+        for s, _, _ in partida(juego, rnd):
+            yield s
+
+
+def sin_doble_ganador(tablero):
+    """
+    True si a lo más un jugador tiene tres en línea. Con los dos, las
+    versiones pueden dar ganadores distintos según el orden en que revisan
+    las líneas, pero eso no pasa en un juego
+
+    """
+    return len({tablero[a] for a, b, c in LINEAS_GATO
+                if tablero[a] == tablero[b] == tablero[c] != 0}) <= 1
+
+
+def test_gato():
+    juego = gato.Gato()
+    # Los 3^9 tableros posibles
+    for s in product((0, 1, -1), repeat=9):
+        if sin_doble_ganador(s):
+            assert juego.terminal(s) == gato_terminal(s)
+            assert juego.ganancia(s) == gato_ganancia(s)
+
+
+def test_checar_victoria():
+    juego = utt.UltimateTTT()
+    for tablero in product((0, 1, -1), repeat=9):
+        if sin_doble_ganador(tablero):
+            assert utt.checar_victoria(tablero) == checar_victoria(tablero)
+            assert juego.victoria(tablero) == checar_victoria(tablero)
+
+
+def test_conecta4():
+    juego = conect4.Conecta4()
+    for s in partidas(juego, 500, 0):
+        ganador = conecta4_ganancia(s)
+        assert juego.ganancia(s) == juego.ganancia(copia(s)) == ganador
+        assert juego.terminal(s) == juego.terminal(copia(s)) == (
+            0 not in s or ganador != 0
+        )
+        assert conect4.evalua_3con(s) == evalua_3con(s)
+        assert conect4.evalua_nuevo(s) == evalua_nuevo(s)
+    # Las evaluaciones también en tableros al azar que no salen en un juego
+    rnd = Random(1)
+    for _ in range(2000):
+        s = tuple(rnd.choice((0, 1, -1)) for _ in range(42))
+        assert conect4.evalua_3con(s) == evalua_3con(s)
+        assert conect4.evalua_nuevo(s) == evalua_nuevo(s)
+
+
+def test_super_gato():
+    juego = utt.UltimateTTT()
+    for s in partidas(juego, 300, 2):
+        valor = simple_evalua_uttt(copia(s))
+        assert utt.simple_evalua_uttt(s) == utt.simple_evalua_uttt(copia(s)) == valor
+        fin = juego.terminal(copia(s))
+        assert juego.terminal(s) == fin
+        if fin:
+            assert juego.ganancia(s) == juego.ganancia(copia(s))
@@ -0,0 +1,96 @@
+"""
+Pruebas de negamax_paralelo y mtdf: con un ordenamiento fijo tienen que
+dar el mismo valor que negamax (y negamax_paralelo la misma jugada), y de
+minimax_iterativo, que deja de profundizar al llegar al final, y de
+JugadorNegamax, que respeta mutable=False
+
+Se corren con: python -m pytest test_minimax.py
+
+"""
+
+from random import Random
+
+import pytest
+
+from conftest import partida
+from minimax import negamax, negamax_paralelo, mtdf, BusquedaParalela
+from minimax import minimax_iterativo, JugadorNegamax
+from benchmark import corre, posicion, POSICIONES
+from conect4 import Conecta4, evalua_nuevo, ordena_centro
+from gato import Gato
+
+
+@pytest.fixture(scope='module')
+def paralela():
+    with BusquedaParalela(3) as paralela:
+        yield paralela
+
+
+def test_paralelo_conecta4(paralela):
+    juego, rnd = Conecta4(), Random(0)
+    for _ in range(6):
+        jugadas = rnd.randrange(12)
+        for n, (s, j, a) in enumerate(partida(juego, rnd)):
+            if n == jugadas:
+                break
+        if a == None:
+            continue
+        traza, v = negamax(juego, s, j, ordena=ordena_centro, d=5, evalua=evalua_nuevo)
+        traza_p, v_p = negamax_paralelo(
+            juego, s, j, ordena=ordena_centro, d=5, evalua=evalua_nuevo,
+            paralela=paralela
+        )
+        assert v_p == v
+        assert traza_p[:2] == traza[:2]
+
+
+def test_paralelo_gato(paralela):
+    juego = Gato()
+    s, j = juego.inicializa()
+    for a in (4, 0):
+        traza, v = negamax(juego, s, j, ordena=ordena_centro)
+        traza_p, v_p = negamax_paralelo(
+            juego, s, j, ordena=ordena_centro, paralela=paralela
+        )
+        assert (traza_p[0], v_p) == (traza[0], v)
+        s, j = juego.transicion(s, a, j), -j
+
+
+def test_mtdf_benchmark():
+    # Las posiciones y configuraciones del benchmark, como las corre --mtdf
+    resultados = corre(busca=negamax)
+    resultados_mtdf = corre(busca=mtdf)
+    for llave, r in resultados.items():
+        assert resultados_mtdf[llave]['valor'] == r['valor'], llave
+
+
+@pytest.mark.parametrize('jugadas', POSICIONES['conecta4']['final'])
+def test_iterativo_final(jugadas):
+    juego, s, j = posicion('conecta4', jugadas)
+    iteraciones = []
+    minimax_iterativo(
+        juego, s, j, tiempo=10, ordena=ordena_centro, evalua=evalua_nuevo,
+        reporta=lambda d, traza, v, stats: iteraciones.append((d, v))
+    )
+    # Ninguna rama pasa de las casillas vacías
+    d, v = iteraciones[-1]
+    assert d <= s.count(0) + 1
+    assert v == negamax(juego, s, j, ordena=ordena_centro)[1]
+
+
+class Conecta4Inmutable(Conecta4):
+    def haz_jugada(self, tablero, a, j):
+        raise AssertionError("Se usó el tablero mutable")
+
+
+@pytest.mark.parametrize('tiempo', [None, 10])
+def test_jugador_inmutable(tiempo):
+    juego = Conecta4Inmutable()
+    s, j = juego.inicializa()
+    jugador = JugadorNegamax(
+        ordena=ordena_centro, d=4, evalua=evalua_nuevo, tiempo=tiempo,
+        mutable=False
+    )
+    assert jugador(juego, s, j) == negamax(
+        Conecta4(), s, j, ordena=ordena_centro, d=4, evalua=evalua_nuevo
+    )[0][0]
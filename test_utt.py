@@ -0,0 +1,31 @@
+"""
+Pruebas de UltimateTTTBits: en partidas al azar, cada posición tiene que
+coincidir con la de UltimateTTT en jugadas legales, fin del juego,
+ganador y evaluación
+
+Se corren con: python -m pytest test_utt.py
+
+"""
+
+from random import Random
+
+from conftest import partida
+from utt import UltimateTTT, UltimateTTTBits, a_tableros
+from utt import simple_evalua_uttt, simple_evalua_uttt_bits
+
+
+def test_bits_equivalente():
+    bits, juego, rnd = UltimateTTTBits(), UltimateTTT(), Random(3)
+    for _ in range(200):
+        anterior = None
+        for s, j, a in partida(bits, rnd):
+            t = a_tableros(s)
+            if anterior != None:
+                assert t == juego.transicion(*anterior)
+            legales = sorted(juego.jugadas_legales(t, j))
+            assert sorted(bits.jugadas_legales(s, j)) == legales
+            assert bits.terminal(s) == juego.terminal(t)
+            if bits.terminal(s):
+                assert bits.ganancia(s) == juego.ganancia(t)
+            assert simple_evalua_uttt_bits(s) == simple_evalua_uttt(t)
+            anterior = t, a, j
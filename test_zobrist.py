@@ -0,0 +1,76 @@
+"""
+Pruebas de las llaves de Zobrist: en partidas al azar, las llaves que se
+actualizan jugada por jugada (con transicion y con haz_jugada/deshaz_jugada)
+tienen que ser las mismas que las calculadas desde cero, y posiciones
+distintas no deben compartir llave
+
+Se corren con: python -m pytest test_zobrist.py
+
+"""
+
+from random import Random
+
+import pytest
+
+from conftest import copia, partida
+from juegos_simplificado import Estado
+from gato import Gato
+from conect4 import Conecta4
+from utt import UltimateTTT
+
+
+def llaves(juego, s, simetria):
+    """
+    Las llaves de s que lleva el juego: la directa y, con simetria, las
+    de las demás simetrías del tablero
+
+    """
+    if not simetria:
+        return (juego.clave(s),)
+    if isinstance(juego, Conecta4):
+        return juego.clave(s), juego.clave_espejo(s)
+    return (juego.clave(s),) + tuple(juego.claves(s))
+
+
+def revisa_partida(juego, rnd, simetria, vistas):
+    """
+    Juega una partida al azar por las dos vías a la vez revisando las
+    llaves en cada posición, la deshace en el tablero mutable y guarda
+    en vistas la posición de cada llave
+
+    """
+    s, j = juego.inicializa()
+    s = Estado(s)
+    if simetria:
+        # A partir de canonica los juegos mantienen todas las llaves
+        juego.canonica(s)
+    tablero = juego.tablero(s)
+    historia = []
+    for s, j, a in partida(juego, rnd, s, j):
+        esperadas = llaves(juego, copia(s), simetria)
+        assert llaves(juego, s, simetria) == esperadas
+        assert llaves(juego, tablero, simetria) == esperadas
+        if a == None:
+            break
+        clave = esperadas[0]
+        assert vistas.setdefault(clave, copia(s)) == copia(s)
+        historia.append((a, j, esperadas))
+        juego.haz_jugada(tablero, a, j)
+
+    for a, j, esperadas in reversed(historia):
+        juego.deshaz_jugada(tablero, a, j)
+        assert llaves(juego, tablero, simetria) == esperadas
+
+
+@pytest.mark.parametrize('simetria', [False, True])
+@pytest.mark.parametrize('clase, partidas, distintas', [
+    # El gato solo tiene 5478 posiciones
+    (Gato, 3000, 4000), (Conecta4, 1000, 15000), (UltimateTTT, 200, 10000)
+])
+def test_llaves_incrementales(clase, partidas, distintas, simetria):
+    juego, rnd, vistas = clase(), Random(0), {}
+    for _ in range(partidas):
+        revisa_partida(juego, rnd, simetria, vistas)
+    # Suficientes posiciones distintas para que la revisión de
+    # colisiones signifique algo
+    assert len(vistas) >= distintas
@@ -34,11 +34,49 @@ empate.
 
 """
 
+from itertools import product
+
 from juegos_simplificado import ModeloJuegoZT2
+from juegos_simplificado import Estado, Tablero
+from juegos_simplificado import zobrist
 from juegos_simplificado import juega_dos_jugadores
 from juegos_simplificado import minimax
-from minimax import jugador_negamax
-from minimax import minimax_iterativo
+from lineas import LINEAS_GATO, SIMETRIAS_GATO, ganador_lineas, inversa
+from minimax import JugadorNegamax
+
+# Llaves de Zobrist: una por casilla (9 * tablero + posicion) y jugador, 
+# una por tablero activo t (en la posicion t + 1) y una para cuando mueven las O
+ZOBRIST = zobrist(81, semilla=1)
+ZOBRIST_ACTIVO = tuple(z[1] for z in zobrist(10, semilla=2))
+ZOBRIST_O = zobrist(1, semilla=3)[0][1]
+# Para los tableros mutables, todo lo que cambia la llave al jugar en la
+# posicion i del tablero b según si antes y después se podía jugar en 
+# cualquier tablero: CAMBIO_CLAVE[9 * b + i][j][2 * antes + despues]
+CAMBIO_CLAVE = tuple(
+    {
+        j: tuple(
+            ZOBRIST[9 * b + i][j] ^ ZOBRIST_O
+            ^ ZOBRIST_ACTIVO[0 if antes else b + 1]
+            ^ ZOBRIST_ACTIVO[0 if despues else i + 1]
+            for antes in (False, True) for despues in (False, True)
+        )
+        for j in (1, -1)
+    }
+    for b in range(9) for i in range(9)
+)
+
+# Las 8 simetrías del gato se aplican igual a los tableros y a las posiciones
+# de cada tablero (y al tablero activo). Para cada simetría g, las llaves de
+# cada casilla y de cada tablero activo ya transformadas
+INVERSAS = tuple(inversa(simetria) for simetria in SIMETRIAS_GATO)
+ZOBRIST_SIM = tuple(
+    tuple(ZOBRIST[9 * simetria[b] + simetria[i]] for b in range(9) for i in range(9))
+    for simetria in SIMETRIAS_GATO
+)
+ZOBRIST_ACTIVO_SIM = tuple(
+    (ZOBRIST_ACTIVO[0],) + tuple(ZOBRIST_ACTIVO[simetria[t] + 1] for t in range(9))
+    for simetria in SIMETRIAS_GATO
+)
 
 class UltimateTTT(ModeloJuegoZT2):
     """
@@ -47,11 +85,12 @@ class UltimateTTT(ModeloJuegoZT2):
     """
     def inicializa(self):
         """
-        Inicializa el estado inicial del juego, el jugador
-        que comienza y que se pueda jugar en cualquier tablero
+        Inicializa el estado inicial del juego (con el jugador
+        que comienza y que se pueda jugar en cualquier tablero)
+        y el jugador que comienza
         
         """
-        return (tuple([tuple([0]*9) for _ in range(9)]), 1, -1)
+        return (tuple([tuple([0]*9) for _ in range(9)]), 1, -1), 1
     
     def jugadas_legales(self, s, j):
         """
@@ -62,12 +101,11 @@ class UltimateTTT(ModeloJuegoZT2):
         tableros, j, t = s
 
         jugadas = []
-        def tablero_ganado(tablero):
-            return self.victoria(tablero) != 0 or all(cell != 0 for cell in tablero)
+        _, cerrados = self.estado_meta(s)
 
-        if t == -1 or tablero_ganado(tableros[t]):
+        if t == -1 or cerrados[t]:
             for b in range(9):
-                if tablero_ganado(tableros[b]):
+                if cerrados[b]:
                     continue
                 for i in range(9):
                     if tableros[b][i] == 0:
@@ -86,42 +124,56 @@ class UltimateTTT(ModeloJuegoZT2):
         para el jugador j
         
         """
-        tableros, _, _ = s
+        tableros, _, activo = s
         b, i = a
 
-        nuevo_tableros = [list(tablero) for tablero in tableros]
-        nuevo_tablero = nuevo_tableros[b]
-
-        nuevo_tablero[i] = j
-
-        sig_activo = i
-
-        if self.victoria(nuevo_tableros[sig_activo]) != 0 or all(cell !=0 for cell in nuevo_tableros[sig_activo]):
-            sig_activo = -1
-
-        sig_jug = -j
-
-        nuevo_tableros = tuple(tuple(tablero) for tablero in nuevo_tableros)
-
-        return(nuevo_tableros, sig_jug, sig_activo)
+        # Solo se reconstruye el tablero b, los otros 8 se comparten con s
+        tablero = tableros[b]
+        tablero = tablero[:i] + (j,) + tablero[i + 1:]
+        tableros = tableros[:b] + (tablero,) + tableros[b + 1:]
+
+        # Solo cambia el estado del tablero b en el tablero grande
+        meta, cerrados = self.estado_meta(s)
+        ganador_b = GANADOR_MINI[tablero]
+        meta = meta[:b] + (ganador_b,) + meta[b + 1:]
+        cerrado_b = ganador_b != 0 or 0 not in tablero
+        cerrados = cerrados[:b] + (cerrado_b,) + cerrados[b + 1:]
+
+        sig_activo = -1 if cerrados[i] else i
+
+        s2 = Estado((tableros, -j, sig_activo))
+        s2.meta, s2.cerrados = meta, cerrados
+        s2.ganador = GANADOR_MINI[meta] if ganador_b != 0 else 0
+        s2.fin = s2.ganador != 0 or all(cerrados)
+        claves = getattr(s, 'claves', None)
+        if claves is None:
+            s2.clave = (
+                self.clave(s) ^ ZOBRIST[9 * b + i][j]
+                ^ ZOBRIST_ACTIVO[activo + 1] ^ ZOBRIST_ACTIVO[sig_activo + 1]
+                ^ ZOBRIST_O
+            )
+        else:
+            # Si ya se usan las simetrías, una llave por cada una
+            s2.claves = tuple(
+                clave ^ z[9 * b + i][j] ^ z_activo[activo + 1]
+                ^ z_activo[sig_activo + 1] ^ ZOBRIST_O
+                for clave, z, z_activo in zip(
+                    claves, ZOBRIST_SIM, ZOBRIST_ACTIVO_SIM
+                )
+            )
+            s2.clave = s2.claves[0]
+        return s2
     
     def terminal(self, s):
         """
         Devuelve True si es terminal el estado actual,
         
         """
-        tableros, j, t = s
-
-        completo_tablero = [self.victoria(tablero) for tablero in tableros]
-
-        if self.victoria(completo_tablero) != 0:
-            return True
-        
-        for tablero in tableros:
-            if self.victoria(tablero) == 0 and any(cell == 0 for cell in tablero):
-                return False
-
-        return True
+        fin = getattr(s, 'fin', None)
+        if fin is not None:
+            return fin
+        meta, cerrados = self.estado_meta(s)
+        return self.victoria(meta) != 0 or all(cerrados)
     
     def ganancia(self, s):
         """
@@ -130,41 +182,288 @@ class UltimateTTT(ModeloJuegoZT2):
         """
         if not self.terminal(s):
             raise ValueError("No usar a menos que el juego este terminado")
-    
-        tableros, j, t = s
-
-        completo_tablero = [self.victoria(tablero) for tablero in tableros]
+        ganador = getattr(s, 'ganador', None)
+        if ganador is not None:
+            return ganador
+        return self.victoria(self.estado_meta(s)[0])
 
-        resultado = self.victoria(completo_tablero)
-
-        return resultado
+    def estado_meta(self, s):
+        """
+        Devuelve (meta, cerrados): el ganador de cada tablero (0 si nadie)
+        y si cada tablero ya está cerrado (ganado o lleno). Los estados que
+        genera transicion ya los traen calculados
+        
+        """
+        meta = getattr(s, 'meta', None)
+        if meta is not None:
+            return meta, s.cerrados
+        tableros = s[0]
+        meta = tuple(self.victoria(tablero) for tablero in tableros)
+        cerrados = tuple(
+            g != 0 or 0 not in tablero for g, tablero in zip(meta, tableros)
+        )
+        return meta, cerrados
 
     def victoria(self, tablero):
         """
         Funcion auxiliar para checar el tablero, regresa el jugador que lo gano o 0 si aun no hay
         
         """
-        if not isinstance(tablero, (list, tuple)) or len(tablero) != 9:
-            raise ValueError(f"Tablero 3x3, no {tablero}")
-
-        for i in range(3):
-            if tablero[3*i] != 0 and tablero[3*i] == tablero[3*i+1] == tablero[3*i+2]:
-                return tablero[3*i]
-            
-        for i in range(3):
-            if tablero[i] != 0 and tablero[i] == tablero[i+3] == tablero[i+6]:
-                return tablero[i]
+        return checar_victoria(tablero)
+    
+    def clave(self, s):
+        """
+        Devuelve la llave de Zobrist del estado s
         
-        if tablero[0] != 0 and tablero[0] == tablero[4] == tablero[8]:
-            return tablero[0]
-        if tablero[2] != 0 and tablero[2] == tablero[4] == tablero[6]:
-            return tablero[2]
+        """
+        clave = getattr(s, 'clave', None)
+        if clave is None:
+            clave = self.claves(s)[0]
+        return clave
+
+    def claves(self, s):
+        """
+        Devuelve las llaves de Zobrist del estado s transformado con cada
+        una de las 8 simetrías del gato
         
-        return 0
-    
-    def congela(self, estado):
-        # Problemas con estado con lista
-        return congela_estado(estado)
+        """
+        claves = getattr(s, 'claves', None)
+        if claves is None:
+            tableros, j, t = s
+            claves = []
+            for z, z_activo in zip(ZOBRIST_SIM, ZOBRIST_ACTIVO_SIM):
+                clave = z_activo[t + 1] ^ (ZOBRIST_O if j == -1 else 0)
+                for b in range(9):
+                    for i in range(9):
+                        if tableros[b][i] != 0:
+                            clave ^= z[9 * b + i][tableros[b][i]]
+                claves.append(clave)
+            claves = tuple(claves)
+        return claves
+
+    def canonica(self, s):
+        """
+        La menor de las llaves de las simetrías de s, y la simetría que la da.
+        A partir de aquí transicion mantiene las 8 llaves en los sucesores
+        
+        """
+        claves = self.claves(s)
+        if isinstance(s, (Estado, Tablero)):
+            s.claves = claves
+        g = min(range(8), key=claves.__getitem__)
+        return claves[g], g
+
+    def jugada_canonica(self, a, g):
+        return SIMETRIAS_GATO[g][a[0]], SIMETRIAS_GATO[g][a[1]]
+
+    def jugada_de_canonica(self, a, g):
+        return INVERSAS[g][a[0]], INVERSAS[g][a[1]]
+
+    def tablero(self, s):
+        """
+        Tablero mutable [tableros, j, t] donde tableros es una lista con
+        las 9 tuplas de los mini tableros. Cada jugada solo cambia una, y
+        como se lleva el índice de cada mini tablero en _TABLEROS, la 
+        nueva tupla se toma de ahí en lugar de crearla
+        
+        """
+        tableros, j, t = s
+        tablero = Tablero((list(tableros), j, t))
+        tablero.indices = [
+            sum(POTENCIAS[i] * (x % 3) for i, x in enumerate(mini))
+            for mini in tableros
+        ]
+        tablero.meta, tablero.cerrados = self.estado_meta(s)
+        tablero.fin = self.terminal(s)
+        tablero.ganador = self.ganancia(s) if tablero.fin else 0
+        tablero.clave = self.clave(s)
+        tablero.claves = getattr(s, 'claves', None)
+        return tablero
+
+    def haz_jugada(self, tablero, a, j):
+        tableros, _, activo = tablero
+        b, i = a
+        # Solo se guarda el meta tablero si cambia (se cierra el tablero b)
+        tablero.pila.append(activo)
+
+        tablero.indices[b] += CAMBIO_INDICE[i][j]
+        mini = tableros[b] = _TABLEROS[tablero.indices[b]]
+        ganador_b = GANADOR_MINI[mini]
+        if ganador_b != 0 or 0 not in mini:
+            meta, cerrados = tablero.meta, tablero.cerrados
+            tablero.pila.append(meta)
+            tablero.pila.append(cerrados)
+            tablero.meta = meta[:b] + (ganador_b,) + meta[b + 1:]
+            tablero.cerrados = cerrados[:b] + (True,) + cerrados[b + 1:]
+            tablero.ganador = GANADOR_MINI[tablero.meta] if ganador_b != 0 else 0
+            tablero.fin = tablero.ganador != 0 or all(tablero.cerrados)
+        sig_activo = -1 if tablero.cerrados[i] else i
+        tablero[1], tablero[2] = -j, sig_activo
+        _cambia_claves(tablero, b, i, j, activo, sig_activo)
+
+    def deshaz_jugada(self, tablero, a, j):
+        b, i = a
+        pila = tablero.pila
+        sig_activo = tablero[2]
+        # Solo se juega en tableros abiertos, así que si b está cerrado
+        # fue esta jugada la que lo cerró
+        if tablero.cerrados[b]:
+            tablero.cerrados = pila.pop()
+            tablero.meta = pila.pop()
+            # Solo se juega en estados no terminales
+            tablero.ganador, tablero.fin = 0, False
+        activo = pila.pop()
+        tablero.indices[b] -= CAMBIO_INDICE[i][j]
+        tablero[0][b] = _TABLEROS[tablero.indices[b]]
+        tablero[1], tablero[2] = j, activo
+        _cambia_claves(tablero, b, i, j, activo, sig_activo)
+
+
+def _cambia_claves(tablero, b, i, j, activo, sig_activo):
+    # Con xor, la misma operación hace y deshace la jugada. Antes de la
+    # jugada el tablero activo era b o cualquiera, y después es i o cualquiera
+    tablero.clave ^= CAMBIO_CLAVE[9 * b + i][j][2 * (activo < 0) + (sig_activo < 0)]
+    if tablero.claves is not None:
+        _cambia_claves_simetricas(tablero, b, i, j, activo, sig_activo)
+
+
+def _cambia_claves_simetricas(tablero, b, i, j, activo, sig_activo):
+    # Aparte de _cambia_claves para que el generador, que captura las
+    # variables, solo cueste cuando se usan las simetrías
+    tablero.claves = tuple(
+        clave ^ z[9 * b + i][j] ^ z_activo[activo + 1]
+        ^ z_activo[sig_activo + 1] ^ ZOBRIST_O
+        for clave, z, z_activo in zip(
+            tablero.claves, ZOBRIST_SIM, ZOBRIST_ACTIVO_SIM
+        )
+    )
+
+
+# Versión con máscaras de bits
+#
+# Cada mini tablero b se guarda como dos máscaras de 9 bits (las X y las O,
+# con el bit i para la posición i), y las 9 máscaras de cada jugador van
+# juntas en un solo entero, la del tablero b en los bits 9b a 9b + 8.
+# Además se llevan tres máscaras de 9 bits del tablero grande: los
+# tableros ganados por las X, los ganados por las O y los cerrados
+# (ganados o llenos).
+#
+# El estado es (x, o, meta_x, meta_o, cerrados, j, t), con j el jugador
+# que mueve y t el tablero activo (-1 si se puede jugar en cualquiera),
+# y el estado inicial es (0, 0, 0, 0, 0, 1, -1). Como en UltimateTTT, j va
+# en el estado para la llave y el evaluador, e inicializa devuelve (s, j).
+
+LLENO = (1 << 9) - 1
+# GANA[m] es True si la máscara m tiene tres en línea
+GANA = tuple(
+    any(all(m >> i & 1 for i in linea) for linea in LINEAS_GATO)
+    for m in range(1 << 9)
+)
+# LIBRES[m] son las posiciones vacías de un mini tablero con ocupadas m
+LIBRES = tuple(
+    tuple(i for i in range(9) if not m >> i & 1) for m in range(1 << 9)
+)
+
+
+def a_tableros(s):
+    """
+    Convierte un estado de UltimateTTTBits en el estado de UltimateTTT
+
+    """
+    x, o, _, _, _, j, t = s
+    return (
+        tuple(
+            tuple(
+                1 if x >> (9 * b + i) & 1 else -1 if o >> (9 * b + i) & 1 else 0
+                for i in range(9)
+            )
+            for b in range(9)
+        ),
+        j, t
+    )
+
+
+def de_tableros(s):
+    """
+    Convierte un estado de UltimateTTT en el estado de UltimateTTTBits
+
+    """
+    tableros, j, t = s
+    x = o = meta_x = meta_o = cerrados = 0
+    for b, tablero in enumerate(tableros):
+        for i, v in enumerate(tablero):
+            if v == 1:
+                x |= 1 << (9 * b + i)
+            elif v == -1:
+                o |= 1 << (9 * b + i)
+        xb, ob = x >> 9 * b & LLENO, o >> 9 * b & LLENO
+        if GANA[xb]:
+            meta_x |= 1 << b
+        elif GANA[ob]:
+            meta_o |= 1 << b
+        if GANA[xb] or GANA[ob] or xb | ob == LLENO:
+            cerrados |= 1 << b
+    return (x, o, meta_x, meta_o, cerrados, j, t)
+
+
+class UltimateTTTBits(ModeloJuegoZT2):
+    """
+    El super gato con máscaras de bits, intercambiable con UltimateTTT
+
+    """
+    def inicializa(self):
+        return (0, 0, 0, 0, 0, 1, -1), 1
+
+    def jugadas_legales(self, s, j):
+        x, o, _, _, cerrados, _, t = s
+        ocupadas = x | o
+        if t != -1:
+            return [(t, i) for i in LIBRES[ocupadas >> 9 * t & LLENO]]
+        return [
+            (b, i) for b in range(9) if not cerrados >> b & 1
+            for i in LIBRES[ocupadas >> 9 * b & LLENO]
+        ]
+
+    def transicion(self, s, a, j):
+        x, o, meta_x, meta_o, cerrados, _, _ = s
+        b, i = a
+        bit = 1 << (9 * b + i)
+        if j == 1:
+            x |= bit
+            if GANA[x >> 9 * b & LLENO]:
+                meta_x |= 1 << b
+                cerrados |= 1 << b
+        else:
+            o |= bit
+            if GANA[o >> 9 * b & LLENO]:
+                meta_o |= 1 << b
+                cerrados |= 1 << b
+        if (x | o) >> 9 * b & LLENO == LLENO:
+            cerrados |= 1 << b
+        t = -1 if cerrados >> i & 1 else i
+        return (x, o, meta_x, meta_o, cerrados, -j, t)
+
+    def terminal(self, s):
+        return GANA[s[2]] or GANA[s[3]] or s[4] == LLENO
+
+    def ganancia(self, s):
+        if not self.terminal(s):
+            raise ValueError("No usar a menos que el juego este terminado")
+        return 1 if GANA[s[2]] else -1 if GANA[s[3]] else 0
+
+
+def simple_evalua_uttt_bits(s):
+    """
+    simple_evalua_uttt para los estados de UltimateTTTBits
+
+    """
+    x, o, meta_x, meta_o, _, j, _ = s
+    puntaje = VALOR_META_BITS[meta_x << 9 | meta_o] + sum(
+        VALOR_MINI_BITS[(x >> 9 * b & LLENO) << 9 | o >> 9 * b & LLENO]
+        for b in range(9)
+    )
+    return puntaje if j == 1 else -puntaje
+
 
 def pprint_uttt(s):
     """
@@ -203,21 +502,7 @@ def checar_victoria(tablero):
     """
     if not isinstance(tablero, (list, tuple)) or len(tablero) != 9:
         raise ValueError(f"Tablero 3x3, no {tablero}")
-
-    for i in range(3):
-        if tablero[3*i] != 0 and tablero[3*i] == tablero[3*i+1] == tablero[3*i+2]:
-            return tablero[3*i]
-            
-    for i in range(3):
-        if tablero[i] != 0 and tablero[i] == tablero[i+3] == tablero[i+6]:
-            return tablero[i]
-        
-    if tablero[0] != 0 and tablero[0] == tablero[4] == tablero[8]:
-        return tablero[0]
-    if tablero[2] != 0 and tablero[2] == tablero[4] == tablero[6]:
-        return tablero[2]
-        
-    return 0
+    return ganador_lineas(tablero, LINEAS_GATO)
 
 def ordena_centro(jugadas, jugador):
     """
@@ -225,60 +510,75 @@ def ordena_centro(jugadas, jugador):
     """
     return sorted(jugadas, key=lambda x: abs(x[0] - 4) + abs(x[1] - 4))
 
-def simple_evalua_uttt(s):
+def _evalua_mini(tablero):
     """
-    Evalua el estado s para el jugador de forma simple
+    Lo que aporta un mini tablero a simple_evalua_uttt para el jugador 1,
+    y quién lo ganó
+    
     """
-    tableros, j, t = s
-    opt = -j
     puntaje = 0
+    result = checar_victoria(tablero)
+    if result == 1:
+        puntaje += 5
+    elif result == -1:
+        puntaje -= 5
+    else:
+        # Da valor a tener dos posiciones en un mini tablero: con casillas
+        # en {-1, 0, 1}, una línea suma 2 solo con dos X y una vacía
+        sumas = [tablero[a] + tablero[b] + tablero[c] for a, b, c in LINEAS_GATO]
+        puntaje += sumas.count(2) - sumas.count(-2)
 
-    def eval_tab(tablero):
-        val = 0
-        lineas = [
-            [0, 1, 2], [3, 4, 5], [6, 7, 8],  # rows
-            [0, 3, 6], [1, 4, 7], [2, 5, 8],  # columns
-            [0, 4, 8], [2, 4, 6]              # diagonals
-        ]
-        for linea in lineas:
-            # Da valor a tener dos posiciones en un mini tablero
-            valores = [tablero[i] for i in linea]
-            if valores.count(j) == 2 and valores.count(0) == 1:
-                val += 1
-            elif valores.count(opt) == 2 and valores.count(0) == 1:
-                val -= 1
-        return val
-
-    # Resultado del tablero grande checando los tableros mini
-    meta_tab = [checar_victoria(b) for b in tableros]
+    # Center control - Valor a tener el centro en un minitablero
+    puntaje += 0.5 * tablero[4]
+    return puntaje, result
 
-    for tablero in tableros:
-        result = checar_victoria(tablero)
-        if result == j:
-            puntaje += 5
-        elif result == opt:
-            puntaje -= 5
-        else:
-            puntaje += eval_tab(tablero)
+def _evalua_meta(meta_tab, meta_resultado):
+    """
+    Lo que aporta el tablero grande a simple_evalua_uttt para el jugador 1,
+    dado quién lo ganó
+    
+    """
+    # Center meta indice - Valor a tener el centro del meta tablero
+    return 1000 * meta_resultado + meta_tab[4]
+
+# Un mini tablero (o el tablero grande) solo tiene 3^9 = 19683 valores
+# posibles, así que lo que aporta cada uno se calcula una sola vez, para el
+# jugador 1 (para el jugador -1 es lo mismo con signo contrario)
+_TABLEROS = tuple(product((0, 1, -1), repeat=9))
+# El índice en _TABLEROS de un mini tablero, con la casilla i valiendo 
+# POTENCIAS[i] por su valor en base 3 (1 -> 1, -1 -> 2, o sea x % 3)
+POTENCIAS = tuple(3 ** (8 - i) for i in range(9))
+CAMBIO_INDICE = tuple({1: p, -1: 2 * p} for p in POTENCIAS)
+VALOR_MINI, GANADOR_MINI = {}, {}
+for _tablero in _TABLEROS:
+    VALOR_MINI[_tablero], GANADOR_MINI[_tablero] = _evalua_mini(_tablero)
+VALOR_META = {
+    _tablero: _evalua_meta(_tablero, GANADOR_MINI[_tablero]) for _tablero in _TABLEROS
+}
+
+# Para UltimateTTTBits la llave es x << 9 | o, con x y o las máscaras de las
+# X y las O, en el mismo orden que _TABLEROS
+_MASCARAS = tuple(map(sum, product(*((0, 1 << (9 + i), 1 << i) for i in range(9)))))
+VALOR_MINI_BITS = {k: VALOR_MINI[tab] for k, tab in zip(_MASCARAS, _TABLEROS)}
+VALOR_META_BITS = {k: VALOR_META[tab] for k, tab in zip(_MASCARAS, _TABLEROS)}
 
-        # Center control - Valor a tener el centro en un minitablero
-        if tablero[4] == j:
-            puntaje += 0.5
-        elif tablero[4] == opt:
-            puntaje -= 0.5
+def simple_evalua_uttt(s):
+    """
+    Evalua el estado s para el jugador de forma simple
+    """
+    tableros, j, t = s
 
-    meta_resultado = checar_victoria(meta_tab)
-    if meta_resultado == j:
-        puntaje += 1000
-    elif meta_resultado == opt:
-        puntaje -= 1000
+    # Resultado del tablero grande checando los tableros mini (los estados
+    # que genera UltimateTTT.transicion ya lo traen)
+    meta_tab = getattr(s, 'meta', None)
+    if meta_tab is None:
+        meta_tab = tuple(GANADOR_MINI[tablero] for tablero in tableros)
 
-    # Center meta indice - Valor a tener el centro del meta tablero
-    if meta_tab[4] == j:
-        puntaje += 1
-    elif meta_tab[4] == opt:
-        puntaje -= 1
-    return puntaje
+    # Con un ciclo en lugar de sum no se crea un generador en cada hoja
+    puntaje = VALOR_META[meta_tab]
+    for tablero in tableros:
+        puntaje += VALOR_MINI[tablero]
+    return puntaje if j == 1 else -puntaje
 
 def jugador_manual_uttt(juego, s, j):
     pprint_uttt(s)
@@ -326,15 +626,15 @@ def jugare(juego):
             d = None
             while type(d) != int or d < 1:
                 d = int(input("Profundidad: "))
-            jugs.append(lambda juegos, s, j: jugador_negamax(
-                juegos, juegos.congela(s), j, ordena=ordena_centro, evalua=simple_evalua_uttt, d=d)
+            jugs.append(
+                JugadorNegamax(ordena=ordena_centro, evalua=simple_evalua_uttt, d=d)
             )
         else:
             t = None
             while type(t) != int or t < 1:
                 t = int(input("Tiempo: "))
-            jugs.append(lambda juegos, s, j: minimax_iterativo(
-                juegos, juegos.congela(s), j, ordena=ordena_centro, evalua=simple_evalua_uttt, tiempo=t)
+            jugs.append(
+                JugadorNegamax(ordena=ordena_centro, evalua=simple_evalua_uttt, tiempo=t)
             )
 
     g, s_final = juega_dos_jugadores(modelo, jugs[0], jugs[1])
@@ -355,11 +655,10 @@ def jugar(juego):
 
     """
     modelo = juego()
-    estado = modelo.inicializa()
+    estado, j = modelo.inicializa()
 
     while not modelo.terminal(estado):
         pprint_uttt(estado)
-        tableros, j, t = estado
         jugadas = modelo.jugadas_legales(estado, j)
 
         print("Jugadas legales:", jugadas)
@@ -376,6 +675,7 @@ def jugar(juego):
                 print("Formato igual de invalido que Stephen Hawking. Formato Correcto: tablero, posicion (ejemplo: 4,2)")
         
         estado = modelo.transicion(estado, (b, c), j)
+        j = -j
     
     pprint_uttt(estado)
     print("GAME OVER!")
@@ -395,38 +695,5 @@ def jugador_minimax_uttt(juego, s, j):
     """
     return minimax(juego, s, j)
 
-def juega_dos_jugadores(juego, jugador1, jugador2):
-    """
-    Juega un juego de dos jugadores, editado del original para poder utilizar un estado diferente
-    
-    juego: instancia de ModeloJuegoZT
-    jugador1: función que recibe el estado y devuelve la jugada
-    jugador2: función que recibe el estado y devuelve la jugada
-    
-    """
-    s = juego.inicializa()
-    # Falta probar despues de cambiar las transiciones
-    s = juego.congela(s)
-    while not juego.terminal(s):
-        _, j, _ = s
-        a = jugador1(juego, s, j) if j == 1 else jugador2(juego, s, j)
-        s = juego.transicion(s, a, j)
-        s = juego.congela(s)
-        j = -j
-    return juego.ganancia(s), s
-
-def congela_estado(estado):
-    tableros, j, t = estado
-    # Convirtiendo a hashable por problemas con negamax
-    # Falta probar si funciona sin esto otra vez
-    tableros_congelados = tuple(
-        tuple(tuple(row) if isinstance(row, list) else row for row in tablero)
-        if isinstance(tablero, list) else tablero
-        for tablero in tableros
-    )
-
-    t_congelado = tuple(t) if isinstance(t, list) else t
-    return (tableros_congelados, j, t_congelado)
-
 if __name__ == '__main__':
     jugare(UltimateTTT)